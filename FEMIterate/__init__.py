@@ -0,0 +1,6 @@
+"""
+Non-GUI parts of the FEMIterate macro.
+
+Everything in here must be usable without FreeCADGui so the iteration loop
+can be driven from a worker thread.
+"""
@@ -0,0 +1,110 @@
+"""
+Headless runner, used by FEMIterateCmd.py under FreeCADCmd.
+"""
+from .engine import IterationEngine
+from .settings import (SETTINGS_LABEL, TYPEID_FEM_ANALYSIS, TYPEID_FEM_MESH, TYPEID_FEM_SOLVER,
+                       TYPEID_SETTINGS, Settings, find_object_by_typeid)
+import FreeCAD
+import argparse
+import json
+import signal
+import time
+
+EXIT_PASSED = 0
+EXIT_NO_SOLUTION = 1
+EXIT_ERROR = 2
+
+
+def _log(msg, important=False):
+    stamp = time.strftime("%H:%M:%S")
+    if important:
+        msg = f"** {msg}"
+    print(f"[{stamp}] {msg}", flush=True)
+
+
+def run_document(path, save_path=None, summary_path=None, iteration_limit=None):
+    """
+    Open a document, run the study stored in its FEMIterateSettings object
+    and write a JSON summary next to it.
+
+    @returns process exit code
+    """
+    doc = FreeCAD.openDocument(path)
+    FreeCAD.setActiveDocument(doc.Name)
+
+    if not find_object_by_typeid(TYPEID_SETTINGS, SETTINGS_LABEL):
+        _log(f"{path} has no {SETTINGS_LABEL} object, set the study up in the GUI first", True)
+        return EXIT_ERROR
+
+    settings = Settings()
+    if iteration_limit:
+        settings.iteration_limit = iteration_limit
+
+    mesh = find_object_by_typeid(TYPEID_FEM_MESH)
+    analysis = find_object_by_typeid(TYPEID_FEM_ANALYSIS)
+    solver = find_object_by_typeid(TYPEID_FEM_SOLVER)
+    for (obj, name) in ((mesh, "FEM mesh"), (analysis, "FEM analysis"), (solver, "FEM solver")):
+        if obj is None:
+            _log(f"Missing {name}", True)
+            return EXIT_ERROR
+
+    engine = IterationEngine(analysis, solver, mesh, settings, log=_log)
+
+    # Let the queue system stop us cleanly, the original values still get
+    # restored and the summary written.
+    def stop(signum, frame):
+        _log(f"Got signal {signum}, cancelling", True)
+        engine.cancel()
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    _log(f"Running {path}: mode {settings.mode}, {settings.iteration_limit} iterations", True)
+    engine.run()
+
+    summary = {
+        "document": path,
+        "mode": settings.mode,
+        "changes": settings.changes,
+        "checks": settings.checks,
+        "passed": engine.passed,
+        "failed": engine.failed,
+        "cancelled": engine.cancelled,
+        "timed_out": engine.timed_out,
+        "iteration": engine.iteration,
+        "solution_values": engine.solution_values,
+        "result_summaries": engine.result_summaries,
+        "elapsed_time": engine.elapsed_time,
+        "results_file": engine.csv_file_name,
+    }
+    if not summary_path:
+        summary_path = settings.output_file_name("femiterate-summary.json")
+    with open(summary_path, "w") as f:
+        json.dump(summary, f, indent=2)
+    _log(f"Summary written to {summary_path}")
+
+    if save_path:
+        doc.saveAs(save_path)
+        _log(f"Document saved to {save_path}")
+
+    FreeCAD.closeDocument(doc.Name)
+
+    if engine.failed or engine.cancelled or engine.timed_out:
+        return EXIT_ERROR
+    if engine.passed:
+        return EXIT_PASSED
+    return EXIT_NO_SOLUTION
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="FEMIterateCmd",
+                                     description="Run a FEMIterate study without the GUI")
+    parser.add_argument("document", help=".FCStd file with a FEMIterateSettings object")
+    parser.add_argument("--save", metavar="FCSTD",
+                        help="save the document with the final results to this file")
+    parser.add_argument("--summary", metavar="JSON",
+                        help="summary file, defaults to <document>_femiterate-summary.json")
+    parser.add_argument("--iterations", type=int,
+                        help="override the iteration limit stored in the document")
+    args = parser.parse_args(argv)
+
+    return run_document(args.document, args.save, args.summary, args.iterations)
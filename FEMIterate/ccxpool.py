@@ -0,0 +1,195 @@
+from .scheduler import set_affinity
+from .watchdog import WATCH_INTERVAL, ConvergenceMonitor
+from concurrent.futures import ThreadPoolExecutor
+import os
+import subprocess
+import threading
+import time
+
+
+def ccx_env(threads):
+    """
+    @returns the environment for a ccx run with threads solver threads
+    """
+    env = os.environ.copy()
+    # NOTE: None keeps whatever OMP_NUM_THREADS the environment has
+    if threads:
+        env["OMP_NUM_THREADS"] = str(threads)
+        # Used by the SPOOLES solver instead of OMP_NUM_THREADS
+        env["CCX_NPROC_EQUATION_SOLVER"] = str(threads)
+    return env
+
+
+class CcxJob():
+    """
+    A single ccx run of an already written .inp deck.
+    """
+    def __init__(self, iteration, inp_file_name):
+        self.iteration = iteration
+        self.inp_file_name = inp_file_name
+        self.working_dir, inp_name = os.path.split(inp_file_name)
+        self.job_name = os.path.splitext(inp_name)[0]
+
+        self.returncode = None
+        self.stdout = ""
+        self.stderr = ""
+        self.killed = False
+        # Why the iteration was given up: ccx or the checks out of time, or not converging
+        self.aborted = None
+        self.process = None
+        self.elapsed_time = 0.0
+        # Values of the changed properties the deck was written with
+        self.values = {}
+        # Steps the changes were applied with (number or per-property list)
+        # and the search objective, for the checkpoint
+        self.scale = None
+        self.objective = None
+
+        # Set to look the results up from / store them to the result cache
+        self.cache_key = None
+        self.cached = False
+
+        # Set by SpoolPool: the spool directory holding the results and the
+        # compact .npz with the checked fields, if the worker wrote one, or
+        # why the worker could not read them
+        self.spool_id = None
+        self.remote_dir = None
+        self.fields_file = None
+        self.fields_error = None
+
+
+class CcxPool():
+    """
+    Runs ccx jobs concurrently, at most max_jobs at a time.
+
+    The pool threads only wait on the ccx processes, all the actual work
+    happens in the ccx processes themselves. Jobs with a cache key are
+    answered from the result cache when possible.
+
+    With a CpuScheduler the scheduler decides how many jobs run at once and
+    pins every ccx process to the cores it was given.
+
+    A run is killed and marked aborted when it takes longer than timeout
+    seconds or an increment gets cut back max_cutbacks times.
+    """
+    def __init__(self, ccx_binary, max_jobs=1, threads_per_job=None, cache=None, scheduler=None,
+                 timeout=None, max_cutbacks=0):
+        self.ccx_binary = ccx_binary
+        self.timeout = timeout
+        self.max_cutbacks = max_cutbacks
+        self.max_jobs = max(1, max_jobs)
+        self.threads_per_job = threads_per_job
+        self.cache = cache
+        self.scheduler = scheduler
+        if scheduler is not None:
+            self.max_jobs = len(scheduler.cpus)
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_jobs)
+        self._running = set()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _run(self, job):
+        use_cache = self.cache is not None and job.cache_key is not None
+        if use_cache and self.cache.restore(job.cache_key, job.working_dir, job.job_name):
+            job.cached = True
+            job.returncode = 0
+            return job
+
+        cores = None
+        threads = self.threads_per_job
+        if self.scheduler is not None:
+            cores = self.scheduler.acquire(lambda: self._closed or job.killed)
+            threads = len(cores) if cores else None
+
+        with self._lock:
+            # Killed before it got a free slot
+            if self._closed or job.killed:
+                job.killed = True
+                job.returncode = -1
+                if cores:
+                    self.scheduler.release(cores)
+                return job
+
+            monitor = None
+            if self.max_cutbacks:
+                monitor = ConvergenceMonitor(job.working_dir, job.job_name, self.max_cutbacks)
+            # NOTE: ccx is started in the working directory, it may crash if the
+            # current directory is not writable.
+            job.process = subprocess.Popen([self.ccx_binary, "-i", job.job_name],
+                                           cwd=job.working_dir,
+                                           stdout=subprocess.PIPE,
+                                           stderr=subprocess.PIPE,
+                                           env=ccx_env(threads),
+                                           shell=False)
+            if cores:
+                set_affinity(job.process.pid, cores)
+            self._running.add(job)
+
+        start = time.perf_counter()
+        try:
+            stdout, stderr = self._wait(job, start, monitor)
+        finally:
+            with self._lock:
+                self._running.discard(job)
+            job.returncode = job.process.returncode
+            job.process = None
+            job.elapsed_time = time.perf_counter() - start
+            if cores:
+                ok = job.returncode == 0 and not job.killed
+                self.scheduler.release(cores, job.elapsed_time if ok else None)
+
+        job.stdout = stdout.decode(errors="replace")
+        job.stderr = stderr.decode(errors="replace")
+
+        if use_cache and job.returncode == 0 and not job.killed:
+            self.cache.store(job.cache_key, job.working_dir, job.job_name)
+        return job
+
+    def _wait(self, job, start, monitor):
+        """
+        @returns (stdout, stderr) of the ccx process of job once it exits
+        """
+        if not self.timeout and monitor is None:
+            return job.process.communicate()
+
+        while True:
+            try:
+                return job.process.communicate(timeout=WATCH_INTERVAL)
+            except subprocess.TimeoutExpired:
+                pass
+            if job.aborted is not None:
+                continue
+            if self.timeout and time.perf_counter() - start > self.timeout:
+                job.aborted = f"ccx took longer than {self.timeout:g} s"
+            elif monitor is not None:
+                job.aborted = monitor.poll()
+            if job.aborted is not None:
+                with self._lock:
+                    if job.process.poll() is None:
+                        job.process.kill()
+
+    def submit(self, job):
+        """
+        @returns concurrent.futures.Future resolving to the finished job
+        """
+        return self._executor.submit(self._run, job)
+
+    def kill(self, job):
+        with self._lock:
+            job.killed = True
+            if job.process is not None and job.process.poll() is None:
+                job.process.kill()
+
+    def kill_all(self):
+        with self._lock:
+            self._closed = True
+            for job in self._running:
+                job.killed = True
+                if job.process is not None and job.process.poll() is None:
+                    job.process.kill()
+        if self.scheduler is not None:
+            self.scheduler.wake()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,167 @@
+"""
+The changes of a run resolved once: object handles, parsed values and the
+property value of every step. Step n is the original value with the change
+applied n times, fractional steps (search mode, Latin hypercube designs)
+lie on the line between their neighbours.
+"""
+from .checks import CHANGE_NAMES, FUNCTIONS, CheckError, compile_expr
+from FreeCAD import Units
+import FreeCAD
+import math
+
+USERTYPE_NUMBER = "Number"
+USERTYPE_UNIT = "Unit"
+USERTYPE_PYTHON = "Python expr."
+USERTYPES = [USERTYPE_NUMBER, USERTYPE_UNIT, USERTYPE_PYTHON]
+
+
+class ChangeError(ValueError):
+    pass
+
+
+class PlannedChange():
+    def __init__(self, obj, objname, prop, change, steps):
+        self.obj = obj
+        self.key = (objname, prop)
+        self.name = f"{objname}.{prop}"
+        self.type = change["type"]
+
+        current = getattr(obj, prop)
+        # Number properties keep their Python type, Integer ones stay int
+        self._int = isinstance(current, int) and not isinstance(current, bool)
+        self._str = isinstance(current, str)
+        self._quantity = isinstance(current, Units.Quantity)
+
+        self._code = None
+        if self.type == USERTYPE_UNIT:
+            self._delta = Units.Quantity(change["val"])
+        elif self.type == USERTYPE_NUMBER:
+            # A plain number added to a quantity is in its unit
+            self._delta = float(change["val"])
+            if self._quantity:
+                self._delta = Units.Quantity(self._delta, current.Unit)
+        elif self.type == USERTYPE_PYTHON:
+            self._delta = None
+            self._code = compile_expr(change["val"], CHANGE_NAMES)
+        else:
+            raise ChangeError(f"{self.name}: unknown change type {self.type}")
+
+        self._values = [self.parse(change["orig"])]
+        self._extend(steps)
+
+    def parse(self, text):
+        """
+        @returns property value of a string saved with str(value)
+        """
+        if self.type == USERTYPE_UNIT or self._quantity:
+            return Units.Quantity(text)
+        if self._str and self.type == USERTYPE_PYTHON:
+            return text
+        return int(float(text)) if self._int else float(text)
+
+    def _extend(self, steps):
+        env = {"__builtins__": {}}
+        env.update(FUNCTIONS)
+        while len(self._values) <= steps:
+            n = len(self._values)
+            if self._code is None:
+                value = self._values[0] + self._delta * n
+            else:
+                env["x"] = self._values[-1]
+                env["i"] = n - 1
+                try:
+                    value = eval(self._code, env)
+                except Exception as e:
+                    raise ChangeError(f"{self.name}: expression failed at step {n}: {e}")
+            self._values.append(value)
+
+    def value(self, step):
+        step = max(0.0, float(step))
+        lo = math.floor(step)
+        self._extend(lo + 1)
+        if step == lo:
+            value = self._values[lo]
+        elif self._code is None:
+            value = self._values[0] + self._delta * step
+        else:
+            (a, b) = (self._values[lo], self._values[lo + 1])
+            value = a + (b - a) * (step - lo)
+        if self._int:
+            value = int(round(value))
+        return value
+
+
+class ChangePlan():
+    def __init__(self, changes_dict, steps=0):
+        """
+        @param steps number of steps to precompute the values of
+        @raises ChangeError if an object is gone or a change can't be parsed
+        """
+        doc = FreeCAD.ActiveDocument
+        self.changes = []
+        for (objname, changes) in changes_dict.items():
+            obj = doc.getObject(objname)
+            if obj is None:
+                raise ChangeError(f"Object {objname} is not in the document")
+            for (prop, change) in changes.items():
+                try:
+                    self.changes.append(PlannedChange(obj, objname, prop, change, steps))
+                except (CheckError, ValueError) as e:
+                    raise ChangeError(f"{objname}.{prop}: {e}")
+        self.names = [c.name for c in self.changes]
+        # name -> value last written, unchanged values are not written again
+        self._written = {}
+        # name -> editor mode before lock()
+        self._editor_modes = {}
+
+    def values(self, scale):
+        """
+        @param scale number or {(object name, property): number}
+        @returns [(change, value)]
+        """
+        return [(c, c.value(scale[c.key] if isinstance(scale, dict) else scale))
+                for c in self.changes]
+
+    def apply(self, scale):
+        """
+        Set every property to its value at step scale. All values are
+        computed before the first property is written.
+        """
+        writes = self.values(scale)
+        for (c, value) in writes:
+            if c.name in self._written and self._written[c.name] == value:
+                continue
+            setattr(c.obj, c.key[1], value)
+            self._written[c.name] = value
+
+    def lock(self):
+        """
+        Make the changed properties read-only in the property editor, so
+        they are not edited while the run writes them.
+        """
+        for c in self.changes:
+            mode = c.obj.getEditorMode(c.key[1])
+            self._editor_modes[c.name] = mode
+            if "ReadOnly" not in mode:
+                c.obj.setEditorMode(c.key[1], list(mode) + ["ReadOnly"])
+
+    def unlock(self):
+        for c in self.changes:
+            if c.name in self._editor_modes:
+                c.obj.setEditorMode(c.key[1], self._editor_modes.pop(c.name))
+
+    def current_values(self):
+        """
+        @returns {"Object.Property": value string} of all changed properties
+        """
+        return {c.name: str(getattr(c.obj, c.key[1])) for c in self.changes}
+
+    def revert(self, changes_dict):
+        """
+        Restore the "orig" values of changes_dict, the plan may have been
+        built from different (warm start) ones.
+        """
+        for c in self.changes:
+            (objname, prop) = c.key
+            setattr(c.obj, prop, c.parse(changes_dict[objname][prop]["orig"]))
+        self._written = {}
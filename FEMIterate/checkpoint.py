@@ -0,0 +1,112 @@
+"""
+Per-iteration checkpoints so a run that died with FreeCAD can be resumed,
+and the last passing configuration for warm starts.
+
+The checkpoint is a JSON lines file: a header with the fingerprint of the
+study, one record per checked iteration and a footer once the run is over.
+Every line is synced to disk before the next iteration starts.
+"""
+import json
+import os
+
+CHECKPOINT_VERSION = 1
+
+
+def _jsonable(v):
+    # Check values are often NumPy scalars
+    if isinstance(v, (list, tuple)):
+        return [_jsonable(x) for x in v]
+    if isinstance(v, dict):
+        return {k: _jsonable(x) for (k, x) in v.items()}
+    if isinstance(v, (bool, int, float, str)) or v is None:
+        return v
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return str(v)
+
+
+def _read_lines(path):
+    lines = []
+    with open(path) as f:
+        for line in f:
+            try:
+                lines.append(json.loads(line))
+            except ValueError:
+                # Half written last line, the iteration did not complete
+                break
+    return lines
+
+
+class Checkpoint():
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def open(self, fingerprint, resume=True):
+        """
+        Continue the checkpoint of an unfinished run of the same study, or
+        start a new one.
+
+        @returns records of the iterations completed before
+        """
+        records = []
+        if resume and os.path.isfile(self.path):
+            lines = _read_lines(self.path)
+            if (lines and lines[0].get("version") == CHECKPOINT_VERSION
+                    and lines[0].get("fingerprint") == fingerprint
+                    and not any(line.get("finished") for line in lines[1:])):
+                records = lines[1:]
+
+        if records:
+            # Rewrite without a possibly half written last line
+            self._file = open(self.path, "w")
+            for line in [{"version": CHECKPOINT_VERSION, "fingerprint": fingerprint}] + records:
+                self._write(line)
+        else:
+            self._file = open(self.path, "w")
+            self._write({"version": CHECKPOINT_VERSION, "fingerprint": fingerprint})
+        return records
+
+    def _write(self, line):
+        self._file.write(json.dumps(line) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def write(self, record):
+        self._write({k: _jsonable(v) for (k, v) in record.items()})
+
+    def finish(self, passed, iteration, solution_values):
+        self._write({"finished": True, "passed": passed, "iteration": iteration,
+                     "solution_values": solution_values})
+        self.close()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def save_solution(path, changes, values):
+    """
+    Remember the property values of a passing run for warm starts.
+    """
+    with open(path, "w") as f:
+        json.dump({"properties": sorted(f"{o}.{p}" for (o, c) in changes.items() for p in c),
+                   "values": values}, f, indent=1)
+
+
+def load_solution(path, changes):
+    """
+    @returns {"Object.Property": value} of the last passing run of a study
+             changing the same properties, or None
+    """
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    props = sorted(f"{o}.{p}" for (o, c) in changes.items() for p in c)
+    if data.get("properties") != props:
+        return None
+    return data["values"]
@@ -0,0 +1,222 @@
+import ast
+import builtins
+import numpy as np
+import operator
+
+
+class CheckError(ValueError):
+    pass
+
+
+def _is_array(v):
+    return isinstance(v, (np.ndarray, list, tuple))
+
+
+def _max(*args):
+    if len(args) == 1 and _is_array(args[0]):
+        return np.max(args[0])
+    return builtins.max(*args)
+
+
+def _min(*args):
+    if len(args) == 1 and _is_array(args[0]):
+        return np.min(args[0])
+    return builtins.min(*args)
+
+
+def _sum(v):
+    return np.sum(v)
+
+
+def _mean(v):
+    return np.mean(v)
+
+
+def _median(v):
+    return np.median(v)
+
+
+def _percentile(v, q):
+    return np.percentile(v, q)
+
+
+# Functions available in check expressions, the array ones run vectorized
+FUNCTIONS = {
+    "max": _max,
+    "min": _min,
+    "sum": _sum,
+    "mean": _mean,
+    "median": _median,
+    "percentile": _percentile,
+    "abs": np.abs,
+    "sqrt": np.sqrt,
+    "len": len,
+    "any": np.any,
+    "all": np.all,
+    "float": float,
+    "int": int,
+    "round": round,
+}
+
+# r is the result object, i is the iteration number
+CHECK_NAMES = {"r", "i"}
+# x is the current property value, i is the iteration number
+CHANGE_NAMES = {"x", "i"}
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.Compare, ast.BoolOp, ast.UnaryOp, ast.BinOp, ast.IfExp,
+    ast.Call, ast.Name, ast.Load, ast.Attribute, ast.Constant, ast.Subscript,
+    ast.Slice, ast.Tuple, ast.List,
+    ast.And, ast.Or, ast.Not, ast.USub, ast.UAdd,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+)
+
+_COMPARE_OPS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+
+def validate_expr(expr, names=CHECK_NAMES):
+    """
+    Parse an expression and make sure it only uses whitelisted syntax,
+    functions and names.
+
+    @returns parsed ast.Expression
+    @raises CheckError with a message for the user
+    """
+    try:
+        tree = ast.parse(expr, mode="eval")
+    except SyntaxError as e:
+        raise CheckError(f"Syntax error: {e.msg}")
+
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise CheckError(f"{type(node).__name__} is not allowed in expressions")
+        if isinstance(node, ast.Name) and node.id not in names and node.id not in FUNCTIONS:
+            raise CheckError(f"Unknown name '{node.id}'")
+        if isinstance(node, ast.Attribute):
+            if node.attr.startswith("_"):
+                raise CheckError(f"Private attribute '{node.attr}' is not allowed")
+            if not isinstance(node.value, ast.Name) or node.value.id not in names:
+                raise CheckError("Attributes can only be read from the expression variables")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+                raise CheckError("Only the builtin check functions can be called")
+
+    return tree
+
+
+def compile_expr(expr, names=CHECK_NAMES):
+    tree = validate_expr(expr, names)
+    return compile(tree, f"<{expr}>", "eval")
+
+
+def result_fields(expr):
+    """
+    @returns set of r.<field> attributes an expression reads
+    """
+    tree = validate_expr(expr)
+    return {node.attr for node in ast.walk(tree)
+            if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name)
+            and node.value.id == "r"}
+
+
+class ResultView():
+    """
+    Read-only view of a FEM result object for check expressions. List fields
+    (vonMises, Temperature, ...) are converted to NumPy arrays once and then
+    shared by all the checks of the iteration.
+    """
+    def __init__(self, result):
+        self._result = result
+        self._fields = {}
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self._fields[name]
+        except KeyError:
+            pass
+
+        value = getattr(self._result, name)
+        if isinstance(value, (list, tuple)):
+            value = np.asarray(value, dtype=float)
+        self._fields[name] = value
+        return value
+
+
+class CompiledCheck():
+    """
+    A check compiled once per run. Single comparisons are split into their
+    sides, so the value of the left side is available without evaluating
+    it twice.
+    """
+    def __init__(self, expr):
+        self.expr = expr
+        tree = validate_expr(expr)
+
+        node = tree.body
+        if isinstance(node, ast.Compare) and len(node.ops) == 1:
+            self._left = self._compile_node(node.left)
+            self._right = self._compile_node(node.comparators[0])
+            self._op = _COMPARE_OPS[type(node.ops[0])]
+            self._code = None
+        else:
+            self._code = compile(tree, f"<{expr}>", "eval")
+
+    def _compile_node(self, node):
+        return compile(ast.Expression(body=node), f"<{self.expr}>", "eval")
+
+    def evaluate(self, env):
+        """
+        @returns (value, passed), value is the left side of a comparison or
+                 the result of the whole expression
+        """
+        if self._code is not None:
+            ret = eval(self._code, env)
+            return (ret, _is_true(ret))
+
+        left = eval(self._left, env)
+        right = eval(self._right, env)
+        return (left, _is_true(self._op(left, right)))
+
+
+def _is_true(v):
+    # NOTE: only real booleans pass, same as the old "ret is True" test
+    return isinstance(v, (bool, np.bool_)) and bool(v)
+
+
+def make_env(result, iteration):
+    env = {"__builtins__": {}}
+    env.update(FUNCTIONS)
+    env["r"] = ResultView(result) if result is not None else None
+    env["i"] = iteration
+    return env
+
+
+class CompiledChecks():
+    def __init__(self, checks):
+        """
+        @raises CheckError if any of the checks is invalid
+        """
+        self.checks = []
+        for expr in checks:
+            try:
+                self.checks.append(CompiledCheck(expr))
+            except CheckError as e:
+                raise CheckError(f"{expr}: {e}")
+
+    def evaluate(self, env):
+        """
+        @param env from make_env()
+        @returns (all passed, [(value, passed)] per check)
+        """
+        check_results = [c.evaluate(env) for c in self.checks]
+        return (all(passed for (_, passed) in check_results), check_results)
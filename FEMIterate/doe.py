@@ -0,0 +1,98 @@
+"""
+Design of experiments over the change table. Every changed property is a
+factor, a design point gives each factor its number of steps, i.e. the
+property is set to orig + steps * change.
+"""
+import itertools
+import random
+
+DESIGN_FACTORIAL = "Full factorial"
+DESIGN_LHS = "Latin hypercube"
+DESIGN_OFAT = "One factor at a time"
+DESIGNS = [DESIGN_FACTORIAL, DESIGN_LHS, DESIGN_OFAT]
+
+ORDER_GENERATED = "As generated"
+ORDER_SMALLEST = "Smallest first"
+ORDER_LARGEST = "Largest first"
+ORDERS = [ORDER_GENERATED, ORDER_SMALLEST, ORDER_LARGEST]
+
+PRUNE_OFF = "Off"
+# More steps make the checks easier to pass, e.g. a thicker plate
+PRUNE_MORE_HELPS = "More steps help"
+# Fewer steps make the checks easier to pass
+PRUNE_FEWER_HELPS = "Fewer steps help"
+PRUNINGS = [PRUNE_OFF, PRUNE_MORE_HELPS, PRUNE_FEWER_HELPS]
+
+
+def full_factorial(factors, levels):
+    return list(itertools.product(range(1, levels + 1), repeat=factors))
+
+
+def latin_hypercube(factors, levels, samples, seed=0):
+    """
+    @returns samples points with continuous steps in [1, levels], every
+             factor has exactly one point in each of the samples strata
+    """
+    rng = random.Random(seed)
+    columns = []
+    for _ in range(factors):
+        strata = list(range(samples))
+        rng.shuffle(strata)
+        width = (levels - 1) / samples
+        columns.append([1 + (s + rng.random()) * width for s in strata])
+    return list(zip(*columns))
+
+
+def one_factor_at_a_time(factors, levels):
+    """
+    @returns the all-ones point followed by every factor moved through its
+             levels on its own
+    """
+    points = [(1,) * factors]
+    for f in range(factors):
+        for level in range(2, levels + 1):
+            point = [1] * factors
+            point[f] = level
+            points.append(tuple(point))
+    return points
+
+
+def generate(design, factors, levels, samples, order=ORDER_GENERATED):
+    """
+    @param samples number of points for designs that don't have a fixed size
+    """
+    if design == DESIGN_LHS:
+        points = latin_hypercube(factors, levels, samples)
+    elif design == DESIGN_OFAT:
+        points = one_factor_at_a_time(factors, levels)
+    else:
+        points = full_factorial(factors, levels)
+
+    if order == ORDER_SMALLEST:
+        points.sort(key=sum)
+    elif order == ORDER_LARGEST:
+        points.sort(key=sum, reverse=True)
+    return points
+
+
+class DesignPruner():
+    """
+    Skips points that a failed point shows can't pass, assuming every check
+    is monotonic in every factor.
+    """
+    def __init__(self, pruning):
+        self.pruning = pruning
+        self._failed = []
+
+    def add_failure(self, point):
+        if self.pruning != PRUNE_OFF:
+            self._failed.append(point)
+
+    def is_pruned(self, point):
+        for failed in self._failed:
+            pairs = list(zip(point, failed))
+            if self.pruning == PRUNE_MORE_HELPS and all(p <= f for (p, f) in pairs):
+                return True
+            if self.pruning == PRUNE_FEWER_HELPS and all(p >= f for (p, f) in pairs):
+                return True
+        return False
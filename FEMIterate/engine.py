@@ -0,0 +1,1357 @@
+from .ccxpool import CcxJob, CcxPool
+from .changeplan import ChangeError, ChangePlan
+from .checkpoint import Checkpoint, load_solution, save_solution
+from .checks import CheckError, CompiledChecks, compile_expr, make_env, result_fields
+from .doe import DesignPruner, generate
+from .fidelity import MeshFidelity
+from .frdreader import FrdError, FrdResult, read_frd, supports_fields
+from .inpdeck import DeckPatcher
+from .meshcache import MeshCache
+from .recompute import ScopedRecompute
+from .resultcache import ResultCache, cache_key
+from .resultlog import ResultLog
+from .retention import ResultRetention, summarize
+from .scratch import ScratchSpace
+from .scheduler import SCHEDULE_AUTO, SCHEDULE_WIDE, CpuScheduler
+from .search import BracketSearch, objective_from_check, relative_objective_from_check
+from .settings import MODE_DOE, MODE_SEARCH, MODE_SEQUENTIAL, MODE_SWEEP
+from .spool import SpoolPool
+from .surrogate import SURROGATE_OFF, Surrogate
+from .timing import PhaseTimer
+from .watchdog import TIMEOUT_STOP, call_with_timeout
+from femtools import ccxtools
+import FreeCAD
+import cProfile
+import concurrent.futures
+import copy
+import numpy as np
+import os
+import shutil
+import threading
+import time
+
+
+class CalculationCancelled(Exception):
+    pass
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+class IterationEngine():
+    """
+    Runs the apply -> recompute -> mesh -> ccx -> check loop.
+
+    All feedback goes through the callbacks so this can run on a worker
+    thread without touching any widgets:
+        log(msg, important)
+        progress(percent, text)
+        iteration_done(iteration, passed, result_obj)
+    Every step that changes the document is handed to
+        document(fn) -> fn()
+    which the GUI uses to run them on its own thread, FreeCAD's documents
+    and view providers are not thread-safe. Only waiting for ccx, reading
+    .frd files and evaluating the checks happen on the calling thread.
+    """
+    def __init__(self, analysis, solver, fem_mesh, settings,
+                 log=None, progress=None, iteration_done=None):
+        self.analysis = analysis
+        self.solver = solver
+        self.fem_mesh = fem_mesh
+        # NOTE: copies, the panel may change its settings while this runs
+        self.changes = copy.deepcopy(settings.changes)
+        self.checks = list(settings.checks)
+        self.iteration_limit = settings.iteration_limit
+        self.mode = settings.mode
+        self.parallel_jobs = settings.parallel_jobs
+        self.scheduler = settings.scheduler
+        self.objective = settings.objective
+        self.search_tolerance = settings.search_tolerance
+        self.doe_design = settings.doe_design
+        self.doe_levels = settings.doe_levels
+        self.doe_order = settings.doe_order
+        self.doe_pruning = settings.doe_pruning
+        self.surrogate = settings.surrogate
+        self.mesh_cache_size = settings.mesh_cache_size
+        self.result_cache_dir = settings.result_cache_dir
+        self.result_cache_size = settings.result_cache_size
+        self.csv_file_name = settings.csv_file_name()
+        self.fast_results = settings.fast_results
+        self.patch_deck = settings.patch_deck
+        self.scoped_recompute = settings.scoped_recompute
+        self.coarse_mesh = settings.coarse_mesh
+        self.coarse_margin = settings.coarse_margin
+        self.scratch = settings.scratch
+        self.scratch_dir = settings.scratch_dir
+        self.scratch_size = settings.scratch_size
+        self.ccx_timeout = settings.ccx_timeout
+        self.max_cutbacks = settings.max_cutbacks
+        self.check_timeout = settings.check_timeout
+        self.run_timeout = settings.run_timeout
+        self.timeout_policy = settings.timeout_policy
+        self.keep_files = {ext.strip(". ").lower() for ext in settings.keep_files.replace(",", " ").split()}
+        self.spool_dir = settings.spool_dir
+        self.spool_local_workers = settings.spool_local_workers
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self.profile_file_name = None
+        if settings.profile:
+            self.profile_file_name = settings.output_file_name(f"femiterate-{stamp}.prof")
+        self.keep_results = settings.keep_results
+        self.keep_results_count = settings.keep_results_count
+        self.archive_dir = settings.output_file_name(f"femiterate-results-{stamp}")
+        self.resume = settings.resume
+        self.warm_start = settings.warm_start
+        self.checkpoint_file = settings.output_file_name("femiterate-checkpoint.jsonl")
+        self.warm_start_file = settings.output_file_name("femiterate-warmstart.json")
+
+        self.on_log = log
+        self.on_progress = progress
+        self.on_iteration_done = iteration_done
+        self.on_document = None
+
+        self._cancel_requested = False
+        self._out_of_time = False
+        self._pool = None
+        self._mesh_cache = None
+        self._result_cache = None
+        self._result_log = None
+        self._compiled_checks = None
+        self._deck_patcher = None
+        self._retention = None
+        # Compiled objectives of the checks when the surrogate is used, and
+        # iteration -> their values / surrogate predictions
+        self._margin_codes = None
+        self._margins = {}
+        self._predictions = {}
+        self._checkpoint = None
+        # iteration -> checkpoint record of the iterations done before resuming
+        self._resumed = {}
+        # Changes the iterations start from, the warm start values as "orig"
+        self._run_changes = self.changes
+        self._plan = None
+        self._scoped_recompute = None
+        # Coarse mesh of multi-fidelity runs, the compiled relative objectives
+        # of the checks and iteration -> the largest of them
+        self._fidelity = None
+        self._closeness_codes = None
+        self._closeness = {}
+        # RAM-backed iteration directories and where the kept files go
+        self._scratch = None
+        self._persistent_dir = None
+        # Result fields read straight from the .frd, None imports full results
+        self._fast_fields = None
+        # iteration -> finished CcxJob
+        self._jobs = {}
+        self._timer = PhaseTimer()
+
+        # Outcome of the run, valid after run() returns
+        self.iteration = 0
+        self.passed = False
+        self.failed = False
+        self.cancelled = False
+        # Stopped by RunTimeout, or by an iteration's budget with the Stop policy
+        self.timed_out = False
+        self.elapsed_time = 0.0
+        # Values of the changed properties at the reported iteration
+        self.solution_values = None
+        # iteration -> scalar summary of the result objects that were removed
+        self.result_summaries = {}
+        # iteration -> surrogate prediction error per check
+        self.surrogate_errors = {}
+
+    def log(self, msg, important=False):
+        if self.on_log:
+            self.on_log(msg, important)
+        else:
+            print(msg)
+
+    def _in_document(self, fn, *args):
+        """
+        @returns fn(*args), called wherever document changes have to happen
+        """
+        if self.on_document:
+            return self.on_document(lambda: fn(*args))
+        return fn(*args)
+
+    def _progress(self, percent, text):
+        if self.on_progress:
+            self.on_progress(percent, text)
+
+    def cancel(self):
+        """
+        Request the run to stop. Safe to call from another thread, running
+        ccx processes are killed right away and the loop stops at the next phase.
+        """
+        self._cancel_requested = True
+        pool = self._pool
+        if pool is not None:
+            pool.kill_all()
+
+    def _run_out_of_time(self):
+        self._out_of_time = True
+        pool = self._pool
+        if pool is not None:
+            pool.kill_all()
+
+    def _check_cancel(self):
+        if self._cancel_requested:
+            raise CalculationCancelled()
+        if self._out_of_time:
+            raise BudgetExceeded(f"Run took longer than {self.run_timeout:g} s")
+
+    def _new_result(self, group_size, iteration):
+        """
+        @returns the result object load_results() appended to the analysis
+                 after its first group_size members, labelled by iteration
+        """
+        for femobj in self.analysis.Group[group_size:]:
+            if femobj.isDerivedFrom("Fem::FemResultObject"):
+                femobj.Label = f"Iteration{iteration}"
+                return femobj
+        return None
+
+    def prepare_deck(self, fea, iteration, working_dir=None, scale=None):
+        """
+        Apply the changes for the next iteration, remesh and write the .inp deck.
+        The changes are applied scale times, iteration + 1 times by default.
+
+        @returns .inp file name or None if ccx could not be set up
+        """
+        return self._in_document(self._prepare_deck, fea, iteration, working_dir, scale)
+
+    def _prepare_deck(self, fea, iteration, working_dir, scale):
+        timer = self._timer
+
+        self.log("Applying changes...")
+        with timer.phase(iteration, "apply"):
+            self._plan.apply(iteration + 1 if scale is None else scale)
+        self._check_cancel()
+
+        if self._scoped_recompute:
+            recompute = self._scoped_recompute.recompute
+        else:
+            recompute = FreeCAD.ActiveDocument.recompute
+
+        patcher = self._deck_patcher
+        if patcher is not None and patcher.ready:
+            with timer.phase(iteration, "recompute"):
+                recompute()
+            # Only loads changed, the mesh and the rest of the deck stay the same
+            with timer.phase(iteration, "inp_write"):
+                inp_file_name = patcher.write(working_dir or fea.working_dir)
+            self._check_cancel()
+            if inp_file_name:
+                return inp_file_name
+            self.log("Can't patch the deck, writing it in full")
+
+        self.log("Meshing...")
+        with timer.phase(iteration, "recompute"):
+            recompute()
+        with timer.phase(iteration, "mesh"):
+            self._mesh_cache.update_mesh(self.fem_mesh, self.log)
+        self._check_cancel()
+
+        with timer.phase(iteration, "inp_write"):
+            fea.update_objects()
+            if working_dir:
+                fea.setup_working_dir(working_dir, create=True)
+            else:
+                fea.setup_working_dir()
+            fea.setup_ccx()
+            fem_msg = fea.check_prerequisites()
+
+            if fem_msg:
+                self.log(f"CCX setup error: {fem_msg}")
+                return None
+
+            fea.write_inp_file()
+
+            if patcher is not None and not patcher.ready:
+                if patcher.set_base(fea.inp_file_name):
+                    self.log("Later decks only get their load cards patched")
+                    if self._scratch:
+                        # The later decks include parts of this one
+                        self._scratch.pin(iteration)
+                else:
+                    self.log("Changed constraints not found in the deck, writing every deck in full")
+                    self._deck_patcher = None
+        self._check_cancel()
+        return fea.inp_file_name
+
+    def _working_dir(self, base_dir, iteration):
+        """
+        @returns working directory of an iteration of the parallel modes
+        """
+        if self._scratch:
+            return self._scratch.iteration_dir(iteration)
+        return os.path.join(base_dir, f"iteration{iteration}")
+
+    def make_job(self, iteration, inp_file_name, scale=None):
+        job = CcxJob(iteration, inp_file_name)
+        job.values = self._plan.current_values()
+        job.scale = scale
+        if self._result_cache:
+            job.cache_key = cache_key(inp_file_name, job.values,
+                                      self.solver, self._pool.ccx_binary)
+        return job
+
+    def _make_pool(self, fea, scheduler):
+        timeout = self.ccx_timeout or None
+        if not self.spool_dir:
+            return CcxPool(fea.ccx_binary, cache=self._result_cache, scheduler=scheduler,
+                           timeout=timeout, max_cutbacks=self.max_cutbacks)
+
+        self.log(f"Handing ccx runs to spool workers in {self.spool_dir}", True)
+        if self._result_cache:
+            self.log("Result cache is not used with spool workers")
+        # NOTE: the workers pick their own thread count unless they share our machine
+        threads = None
+        if self.spool_local_workers:
+            threads = max(1, len(scheduler.cpus) // self.spool_local_workers)
+        return SpoolPool(self.spool_dir, fea.ccx_binary, self._fast_fields,
+                         threads, self.spool_local_workers, timeout, self.max_cutbacks)
+
+    def _load_spool_fields(self, job):
+        result = FrdResult(f"Iteration{job.iteration} (fields only)")
+        with np.load(job.fields_file) as data:
+            for name in data.files:
+                setattr(result, name, data[name])
+        return result
+
+    def load_result(self, fea, job):
+        if job.cached:
+            self.log(f"Using cached results for iteration {job.iteration+1}")
+        self._timer.add(job.iteration, "ccx", job.elapsed_time)
+
+        self._jobs[job.iteration] = job
+
+        with self._timer.phase(job.iteration, "load"):
+            if self._fast_fields is not None and job.fields_error:
+                self.log(f"Fast result reading failed on the spool worker, importing full results: "
+                         f"{job.fields_error}")
+            elif self._fast_fields is not None and job.fields_file:
+                return self._load_spool_fields(job)
+            elif self._fast_fields is not None:
+                frd_file_name = os.path.splitext(job.inp_file_name)[0] + ".frd"
+                try:
+                    return read_frd(frd_file_name, self._fast_fields,
+                                    f"Iteration{job.iteration} (fields only)")
+                except FrdError as e:
+                    self.log(f"Fast result reading failed, importing full results: {e}")
+            return self.load_full_result(fea, job)
+
+    def load_full_result(self, fea, job):
+        """
+        Import the results of the job into the analysis as a FEM result object.
+        """
+        if job.remote_dir:
+            # Fetch the full results back from the spool
+            for ext in (".frd", ".dat"):
+                src = os.path.join(job.remote_dir, job.job_name + ext)
+                if os.path.isfile(src):
+                    shutil.copyfile(src, os.path.join(job.working_dir, job.job_name + ext))
+            job.remote_dir = None
+
+        return self._in_document(self._import_result, fea, job)
+
+    def _import_result(self, fea, job):
+        # NOTE: load_results() finds the .frd through the .inp file name
+        fea.inp_file_name = job.inp_file_name
+        group_size = len(self.analysis.Group)
+        fea.load_results()
+        return self._new_result(group_size, job.iteration)
+
+    def _load_final_result(self, fea):
+        """
+        With fast results the iterations have no result objects, import the
+        full results of the reported (or otherwise last) iteration.
+        """
+        if not self._jobs:
+            return
+        if self.iteration in self._resumed:
+            self.log(f"Iteration {self.iteration+1} was solved before resuming, "
+                     "its results are not imported", True)
+            return
+        iteration = self.iteration if self.iteration in self._jobs else max(self._jobs)
+        if self._retention.has(iteration):
+            return
+        self.log(f"Importing full results of iteration {iteration+1}...")
+        self._retention.restore_files(iteration, self._jobs[iteration])
+        self.load_full_result(fea, self._jobs[iteration])
+
+    def _setup_fast_results(self):
+        self._fast_fields = None
+        self._jobs = {}
+        if not self.fast_results:
+            return
+
+        exprs = list(self.checks)
+        if self.objective:
+            exprs.append(self.objective)
+        fields = set()
+        for expr in exprs:
+            fields |= result_fields(expr)
+
+        if supports_fields(fields):
+            self._fast_fields = sorted(fields)
+        else:
+            self.log("Checks use result fields the fast reader does not know, "
+                     "importing full results every iteration")
+
+    def check_result(self, result, job, env=None):
+        """
+        @param env expression environment of the result if one was already made
+        @returns True if all checks passed
+        """
+        self.log(f"Checking iteration {job.iteration+1}...")
+        with self._timer.phase(job.iteration, "check"):
+            if env is None:
+                env = make_env(result, job.iteration)
+            try:
+                evaluated = call_with_timeout(lambda: self._evaluate(env), self.check_timeout)
+            except TimeoutError as e:
+                evaluated = None
+                reason = f"checks {e}"
+        if evaluated is None:
+            self._abort_iteration(job, reason, result)
+            return False
+
+        (passed, check_results, margins, closeness) = evaluated
+        if margins is not None:
+            self._margins[job.iteration] = margins
+        if closeness is not None:
+            self._closeness[job.iteration] = closeness
+        coarse = self._fidelity is not None and self._fidelity.coarse
+        if coarse:
+            if result is not None and not isinstance(result, FrdResult):
+                self._in_document(setattr, result, "Label", f"{result.Label} (coarse)")
+            self.log(f"Iteration {job.iteration+1} on the coarse mesh "
+                     f"{'passed' if passed else 'failed'}, {closeness:+.3f} from the limit")
+
+        self._record_iteration(job, result, passed, check_results, margins, closeness)
+        return passed
+
+    def _record_iteration(self, job, result, passed, check_results, margins, closeness,
+                          aborted=None):
+        """
+        Checkpoint, log and report a checked or aborted iteration and hand its
+        result and working directory over to be kept or removed.
+        """
+        if self._checkpoint:
+            record = {
+                "iteration": job.iteration,
+                "values": job.values,
+                "scale": job.scale,
+                "objective": None if aborted else job.objective,
+                "passed": passed,
+                "checks": check_results,
+                "margins": margins,
+                "predicted": self._predictions.get(job.iteration),
+                "summary": summarize(result) if result is not None and not aborted else None,
+                "coarse": self._fidelity is not None and self._fidelity.coarse,
+                "closeness": closeness,
+            }
+            if aborted:
+                record["aborted"] = aborted
+            self._checkpoint.write(record)
+
+        timings = self._timer.pop(job.iteration)
+        if self._result_log:
+            self._result_log.write(job.iteration, job.values, check_results, timings,
+                                   margins, self._predictions.get(job.iteration))
+
+        if self.on_iteration_done:
+            self.on_iteration_done(job.iteration, passed, result)
+
+        if result is not None and not isinstance(result, FrdResult):
+            self._in_document(self._retention.add, job.iteration, result, passed, job)
+        if self._scratch:
+            self._scratch.done(job.iteration, keep=passed)
+
+    def _evaluate(self, env):
+        """
+        @returns (passed, check results, margins, closeness) of a result
+        """
+        (passed, check_results) = self._compiled_checks.evaluate(env)
+        margins = None
+        if self._margin_codes is not None:
+            margins = [float(eval(code, env)) for code in self._margin_codes]
+        closeness = None
+        if self._closeness_codes is not None:
+            closeness = max(self._eval_closeness(code, env) for code in self._closeness_codes)
+        return (passed, check_results, margins, closeness)
+
+    def _abort_iteration(self, job, reason, result=None):
+        """
+        Record an iteration that ran out of time or did not converge as
+        failed. The run goes on unless the timeout policy is to stop.
+        """
+        self.log(f"Iteration {job.iteration+1}: {reason}", True)
+        # Checks that ran out of time don't say anything about the point either
+        job.aborted = reason
+        closeness = None
+        if self._closeness_codes is not None:
+            # Not known to be anywhere near passing
+            closeness = float("inf")
+            self._closeness[job.iteration] = closeness
+        self._record_iteration(job, result, False, [(None, False)] * len(self.checks), None,
+                               closeness, aborted=reason)
+
+        if self.timeout_policy == TIMEOUT_STOP:
+            raise BudgetExceeded(f"Stopping, iteration {job.iteration+1} {reason}")
+
+    def _collect(self, pending, timeout=None, on_finished=None):
+        """
+        Wait up to timeout, or until one finishes, for the ccx runs in pending
+        (future -> job) and take the finished ones out of it. Runs that were
+        killed, aborted or failed are dealt with here.
+
+        @param on_finished called with every finished job, e.g. for progress
+        @returns generator of the finished jobs to check
+        """
+        done, _ = concurrent.futures.wait(pending, timeout=timeout,
+                                          return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            job = pending.pop(future)
+            if future.cancelled():
+                self._timer.pop(job.iteration)
+                continue
+            job = future.result()
+            if on_finished:
+                on_finished(job)
+            self._check_cancel()
+
+            if job.killed:
+                self._unchecked(job)
+            elif job.aborted:
+                self._ccx_aborted(job)
+            elif job.returncode:
+                self.log(f"Iteration {job.iteration+1}: CCX exited with code "
+                         f"{job.returncode}: {job.stderr}", True)
+                self._unchecked(job)
+            else:
+                yield job
+
+    def _unchecked(self, job):
+        """
+        Finish the timings of an iteration that was killed or failed in ccx.
+        """
+        self._timer.add(job.iteration, "ccx", job.elapsed_time)
+        self._timer.pop(job.iteration)
+
+    def _ccx_aborted(self, job):
+        self._timer.add(job.iteration, "ccx", job.elapsed_time)
+        self._abort_iteration(job, job.aborted)
+
+    @staticmethod
+    def _eval_closeness(code, env):
+        try:
+            return float(eval(code, env))
+        except ZeroDivisionError:
+            # Both sides are zero, right at the limit
+            return 0.0
+
+    def load_and_check(self, fea, job):
+        """
+        Import the results of a finished ccx job and evaluate the checks on them.
+
+        @returns True if all checks passed
+        """
+        return self.check_result(self.load_result(fea, job), job)
+
+    def calculate_single_shot(self, fea, iteration):
+        """
+        @returns Tri-state logic.
+                 None indicates loop-again, True indicates that we found the
+                 correct solution and False indicates that something went wrong
+        """
+        working_dir = self._scratch.iteration_dir(iteration) if self._scratch else None
+        inp_file_name = self.prepare_deck(fea, iteration, working_dir)
+        if not inp_file_name:
+            return False
+
+        self.log("Solving...")
+        job = self._pool.submit(self.make_job(iteration, inp_file_name)).result()
+        self._check_cancel()
+        if job.aborted:
+            self._ccx_aborted(job)
+            return None
+        if job.returncode:
+            self.log(f"CCX exited with code {job.returncode}: {job.stderr}", True)
+            self._unchecked(job)
+            return False
+
+        if self.load_and_check(fea, job):
+            return True
+        return None
+
+    def _near_limit(self, iteration, passed):
+        # NOTE: failing checks are above 0, passing ones at or below
+        return passed or self._closeness.get(iteration, 0.0) <= self.coarse_margin
+
+    def _set_coarse(self, coarse):
+        self._in_document(self._fidelity.set_coarse, coarse)
+
+    def _use_full_mesh(self):
+        self._set_coarse(False)
+        if self._deck_patcher is not None:
+            # The base deck has the coarse mesh in it
+            self._deck_patcher = DeckPatcher(self.changes, inline=bool(self.spool_dir))
+
+    def _run_sequential(self, fea):
+        """
+        With a coarse mesh the iterations run on it until one passes or gets
+        within coarse_margin of the limit. That iteration is solved again on
+        the full mesh and so is every one after it, so a solution has always
+        passed on the full mesh.
+        """
+        self._pool = self._make_pool(fea, CpuScheduler(SCHEDULE_WIDE))
+        fidelity = self._fidelity
+        if fidelity:
+            self._set_coarse(True)
+
+        start = 0
+        if self._resumed:
+            full = {it: rec for (it, rec) in self._resumed.items() if not rec.get("coarse")}
+            passing = sorted(it for (it, rec) in full.items() if rec["passed"])
+            if passing:
+                self.passed = True
+                self.iteration = passing[0]
+                return
+            start = max(self._resumed) + 1
+            if fidelity and full:
+                self._set_coarse(False)
+            elif fidelity:
+                last = self._resumed[start - 1]
+                self._closeness[start - 1] = last.get("closeness") or 0.0
+                if self._near_limit(start - 1, last["passed"]):
+                    # Stopped before solving it again on the full mesh
+                    start -= 1
+                    self._set_coarse(False)
+        self.iteration = start
+
+        while self.iteration < self.iteration_limit:
+            self._check_cancel()
+            self._progress(int(float(self.iteration+1) / float(self.iteration_limit) * 100),
+                           f"Running iteration {self.iteration+1}/{self.iteration_limit}")
+            self.log(f"Running iteration {self.iteration+1}", True)
+
+            ret = self.calculate_single_shot(fea, self.iteration)
+            if fidelity and fidelity.coarse and ret is not False:
+                if self._near_limit(self.iteration, ret):
+                    self.log(f"Iteration {self.iteration+1} is close to passing, "
+                             "solving it again on the full mesh", True)
+                    self._use_full_mesh()
+                    continue
+                ret = None
+            if ret is not None:
+                if ret is False:
+                    self.failed = True
+                else:
+                    self.passed = True
+                break
+
+            self.iteration += 1
+
+    def _run_sweep(self, fea):
+        """
+        Write the decks for all iterations up front, each into its own working
+        directory, and solve them concurrently. Results are checked as the
+        runs finish; the first (lowest) passing iteration is the solution.
+        """
+        scheduler = CpuScheduler(self.scheduler, self.parallel_jobs, self.iteration_limit, self.log)
+        self._pool = self._make_pool(fea, scheduler)
+        if not self.spool_dir:
+            if self.scheduler == SCHEDULE_AUTO:
+                self.log(f"Sweeping, measuring ccx scaling on {len(scheduler.cpus)} cores first", True)
+            else:
+                self.log(f"Sweeping with {len(scheduler.cpus) // scheduler.threads} concurrent "
+                         f"ccx runs of {scheduler.threads} threads", True)
+
+        self._in_document(fea.setup_working_dir)
+        base_dir = fea.working_dir
+
+        pending = {}
+        finished = 0
+        best = None
+
+        def finished_one(job):
+            nonlocal finished
+            finished += 1
+            self._progress(int(float(finished) / float(self.iteration_limit) * 100),
+                           f"Finished {finished}/{self.iteration_limit} iterations")
+
+        def collect(timeout):
+            nonlocal best
+            for job in self._collect(pending, timeout, finished_one):
+                if self.load_and_check(fea, job) and (best is None or job.iteration < best):
+                    best = job.iteration
+                    # Anything after the best iteration is not needed anymore
+                    for (other_future, other_job) in pending.items():
+                        if other_job.iteration > best:
+                            other_future.cancel()
+                            self._pool.kill(other_job)
+
+        for iteration in range(self.iteration_limit):
+            self._check_cancel()
+            if best is not None and iteration > best:
+                break
+
+            rec = self._resumed.get(iteration)
+            if rec is not None:
+                finished += 1
+                if rec["passed"] and best is None:
+                    best = iteration
+                continue
+
+            self.log(f"Preparing iteration {iteration+1}", True)
+            working_dir = self._working_dir(base_dir, iteration)
+            # Absolute steps, iterations may be skipped when resuming
+            inp_file_name = self.prepare_deck(fea, iteration, working_dir, scale=iteration + 1)
+            if not inp_file_name:
+                self.failed = True
+                break
+
+            job = self.make_job(iteration, inp_file_name, iteration + 1)
+            pending[self._pool.submit(job)] = job
+
+            # Check whatever finished while we were writing the deck
+            collect(0)
+
+        while pending:
+            # Only iterations before the best one can still change the answer
+            if best is not None and all(j.iteration > best for j in pending.values()):
+                break
+            collect(None)
+
+        if best is not None:
+            self.passed = True
+            self.iteration = best
+        else:
+            self.iteration = self.iteration_limit
+
+    def _run_doe(self, fea):
+        """
+        Solve the points of a design over all changed properties concurrently.
+        Points that a failed one shows can't pass are skipped. The passing
+        point with the fewest steps in total is the solution.
+        """
+        factors = [(objname, prop) for (objname, changes) in self.changes.items()
+                   for prop in changes]
+        if not factors:
+            self.log("Design of experiments needs at least one change", True)
+            self.failed = True
+            return
+
+        points = generate(self.doe_design, len(factors), max(1, self.doe_levels),
+                          self.iteration_limit, self.doe_order)
+        if self._margin_codes is not None:
+            self._run_doe_surrogate(fea, factors, points)
+            return
+        if len(points) > self.iteration_limit:
+            self.log(f"Design has {len(points)} points, only the first "
+                     f"{self.iteration_limit} are solved", True)
+            points = points[:self.iteration_limit]
+        self.log(f"{self.doe_design} design with {len(points)} points over {len(factors)} "
+                 f"properties", True)
+
+        scheduler = CpuScheduler(self.scheduler, self.parallel_jobs, len(points), self.log)
+        self._pool = self._make_pool(fea, scheduler)
+        pruner = DesignPruner(self.doe_pruning)
+
+        self._in_document(fea.setup_working_dir)
+        base_dir = fea.working_dir
+
+        pending = {}
+        # iteration -> point, of the passing points
+        passing = {}
+        finished = 0
+        pruned = 0
+
+        def finished_one(job):
+            nonlocal finished
+            finished += 1
+            self._progress(int(float(finished + pruned) / float(len(points)) * 100),
+                           f"Finished {finished}/{len(points)} points, {pruned} pruned")
+
+        def collect(timeout):
+            for job in self._collect(pending, timeout, finished_one):
+                point = points[job.iteration]
+                if self.load_and_check(fea, job):
+                    passing[job.iteration] = point
+                    continue
+                if job.aborted:
+                    # Like resumed aborted points, it doesn't show what can't pass
+                    continue
+
+                pruner.add_failure(point)
+                for other_job in pending.values():
+                    if pruner.is_pruned(points[other_job.iteration]):
+                        self._pool.kill(other_job)
+
+        for (iteration, point) in enumerate(points):
+            self._check_cancel()
+            rec = self._resumed.get(iteration)
+            if rec is not None:
+                finished += 1
+                if rec["passed"]:
+                    passing[iteration] = point
+                elif not rec.get("aborted"):
+                    pruner.add_failure(point)
+                continue
+            if pruner.is_pruned(point):
+                pruned += 1
+                self.log(f"Skipping point {iteration+1}, a failed point covers it")
+                continue
+
+            steps = ", ".join(f"{s:.3g}" for s in point)
+            self.log(f"Preparing point {iteration+1}/{len(points)}: {steps} steps", True)
+            working_dir = self._working_dir(base_dir, iteration)
+            scale = dict(zip(factors, point))
+            inp_file_name = self.prepare_deck(fea, iteration, working_dir, scale=scale)
+            if not inp_file_name:
+                self.failed = True
+                break
+
+            job = self.make_job(iteration, inp_file_name, point)
+            pending[self._pool.submit(job)] = job
+            collect(0)
+
+        while pending:
+            collect(None)
+
+        self.log(f"{len(passing)} of {len(points)} points passed, {pruned} were pruned", True)
+        if not passing:
+            self.iteration = self.iteration_limit
+            return
+
+        self.passed = True
+        self.iteration = min(passing, key=lambda it: (sum(passing[it]), it))
+
+    def _setup_surrogate(self):
+        """
+        The surrogate models the check margins, so every check must be a
+        single comparison.
+        """
+        self._margin_codes = None
+        self._margins = {}
+        self._predictions = {}
+        if self.mode != MODE_DOE or self.surrogate == SURROGATE_OFF:
+            return
+
+        objectives = [objective_from_check(expr) for expr in self.checks]
+        if not objectives or None in objectives:
+            self.log("Surrogate needs every check to be a single comparison, not using it", True)
+            return
+        self._margin_codes = [compile_expr(o) for o in objectives]
+
+    def _promote_files(self):
+        """
+        Copy the kept files of the reported (or otherwise last) iteration out
+        of the scratch directory before it is removed.
+        """
+        iteration = self.iteration if self.iteration in self._jobs else max(self._jobs, default=None)
+        if iteration is None or not self.keep_files:
+            return
+        try:
+            files = self._scratch.promote(iteration, self._persistent_dir, self.keep_files)
+        except OSError as e:
+            self.log(f"Could not keep the files of iteration {iteration+1}: {e}", True)
+            return
+        if files:
+            self.log(f"Kept {', '.join(os.path.basename(f) for f in files)} of iteration "
+                     f"{iteration+1} in {self._persistent_dir}")
+
+    def _setup_fidelity(self):
+        """
+        Multi-fidelity runs need the relative objective of every check to
+        tell how close an iteration is to passing.
+        """
+        self._fidelity = None
+        self._closeness_codes = None
+        self._closeness = {}
+        if self.coarse_mesh <= 1.0:
+            return
+        if self.mode != MODE_SEQUENTIAL:
+            self.log("Coarse meshes are only used in sequential mode", True)
+            return
+
+        objectives = [relative_objective_from_check(expr) for expr in self.checks]
+        if not objectives or None in objectives:
+            self.log("Coarse meshes need every check to be a single comparison, not using them", True)
+            return
+        fidelity = MeshFidelity(self.fem_mesh, self.coarse_mesh)
+        if fidelity.unsupported:
+            self.log(f"Not using coarse meshes, {fidelity.unsupported}", True)
+            return
+        if fidelity.auto_size:
+            self.log(f"Element size is automatic, coarse meshes get at most {self.coarse_mesh:g} times "
+                     f"the {fidelity.auto_size:.3g} mm node spacing of the current mesh", True)
+        self._closeness_codes = [compile_expr(o) for o in objectives]
+        self._fidelity = fidelity
+        self.log(f"Exploring on a mesh {self.coarse_mesh:g} times as coarse", True)
+
+    def _setup_checkpoint(self):
+        """
+        Pick the warm start values and open the checkpoint, resuming an
+        unfinished run of the same study if there is one.
+        """
+        self._run_changes = self.changes
+        if self.warm_start:
+            values = load_solution(self.warm_start_file, self.changes)
+            if values is None:
+                self.log("No passing run to warm start from, starting from the original values")
+            else:
+                self._run_changes = {
+                    objname: {prop: dict(change, orig=values[f"{objname}.{prop}"])
+                              for (prop, change) in changes.items()}
+                    for (objname, changes) in self.changes.items()}
+                self.log(f"Warm starting from {', '.join(f'{k} = {v}' for (k, v) in values.items())}")
+
+        fingerprint = {
+            "mode": self.mode,
+            "changes": self._run_changes,
+            "checks": self.checks,
+            "iteration_limit": self.iteration_limit,
+            "objective": self.objective,
+            "search_tolerance": self.search_tolerance,
+            "doe": [self.doe_design, self.doe_levels, self.doe_order, self.doe_pruning, self.surrogate],
+            "fidelity": [self.coarse_mesh, self.coarse_margin] if self._fidelity else None,
+        }
+        self._resumed = {}
+        self._checkpoint = Checkpoint(self.checkpoint_file)
+        try:
+            records = self._checkpoint.open(fingerprint, self.resume)
+        except OSError as e:
+            self.log(f"Could not open checkpoint: {e}", True)
+            self._checkpoint = None
+            return
+
+        self._resumed = {rec["iteration"]: rec for rec in records}
+        if self._resumed:
+            self.log(f"Resuming, {len(self._resumed)} iterations were done before", True)
+
+    def _run_doe_surrogate(self, fea, factors, points):
+        """
+        Solve a spread out start set of the design points, then keep fitting
+        the surrogate and solve only the points it predicts could pass with
+        fewer steps than the best one so far. Every solve is one iteration.
+        """
+        scheduler = CpuScheduler(self.scheduler, self.parallel_jobs, self.iteration_limit, self.log)
+        self._pool = self._make_pool(fea, scheduler)
+        pruner = DesignPruner(self.doe_pruning)
+        surrogate = Surrogate(self.surrogate, len(self.checks))
+        batch_size = max(1, self.parallel_jobs)
+
+        self._in_document(fea.setup_working_dir)
+        base_dir = fea.working_dir
+
+        # Iterations are indexes into points, so every point keeps its directory
+        solved = set()
+        passing = []
+
+        def solve(batch):
+            pending = {}
+            for iteration in batch:
+                self._check_cancel()
+                rec = self._resumed.get(iteration)
+                if rec is not None:
+                    solved.add(iteration)
+                    if rec.get("aborted"):
+                        continue
+                    if rec["passed"]:
+                        passing.append(iteration)
+                    else:
+                        pruner.add_failure(points[iteration])
+                    surrogate.add(points[iteration], rec["margins"], rec["predicted"])
+                    continue
+                working_dir = self._working_dir(base_dir, iteration)
+                scale = dict(zip(factors, points[iteration]))
+                inp_file_name = self.prepare_deck(fea, iteration, working_dir, scale=scale)
+                if not inp_file_name:
+                    self.failed = True
+                    return
+                job = self.make_job(iteration, inp_file_name, points[iteration])
+                pending[self._pool.submit(job)] = job
+                solved.add(iteration)
+
+            while pending:
+                for job in self._collect(pending):
+                    point = points[job.iteration]
+                    if self.load_and_check(fea, job):
+                        passing.append(job.iteration)
+                    elif job.iteration not in self._margins:
+                        # Checks ran out of time, nothing to learn from
+                        continue
+                    else:
+                        pruner.add_failure(point)
+
+                    errors = surrogate.add(point, self._margins[job.iteration],
+                                           self._predictions.get(job.iteration))
+                    if errors is not None:
+                        self.surrogate_errors[job.iteration] = errors.tolist()
+                        self.log("Surrogate error: " + ", ".join(f"{e:.4g}" for e in errors))
+
+        start = min(len(points), max(3, 2 * len(factors) + 1), self.iteration_limit)
+        indexes = np.unique(np.linspace(0, len(points) - 1, start).round().astype(int))
+        self.log(f"Solving {len(indexes)} of {len(points)} design points to start the surrogate", True)
+        solve(indexes.tolist())
+
+        while not self.failed and len(solved) < self.iteration_limit:
+            best = min((sum(points[it]) for it in passing), default=np.inf)
+            candidates = [it for it in range(len(points)) if it not in solved
+                          and sum(points[it]) < best and not pruner.is_pruned(points[it])]
+            if not candidates:
+                break
+
+            predicted = surrogate.predict([points[it] for it in candidates])
+            if predicted is None:
+                ranked = sorted(candidates, key=lambda it: sum(points[it]))
+            else:
+                # Keep whatever could pass within twice the error seen so far
+                slack = 2.0 * surrogate.rms_error
+                plausible = np.all(predicted - slack <= 0, axis=1)
+                order = sorted((sum(points[it]), float(np.max(p)), it, p)
+                               for (it, p, ok) in zip(candidates, predicted, plausible) if ok)
+                if not order:
+                    self.log("Surrogate predicts none of the remaining points can do better", True)
+                    break
+                ranked = [it for (_, _, it, _) in order]
+                for (_, _, it, p) in order[:batch_size]:
+                    self._predictions[it] = p.tolist()
+
+            batch = ranked[:min(batch_size, self.iteration_limit - len(solved))]
+            self._progress(int(float(len(solved) + 1) / float(self.iteration_limit) * 100),
+                           f"Solving {len(batch)} of {len(candidates)} remaining points")
+            solve(batch)
+
+        self.log(f"Solved {len(solved)} of {len(points)} design points, {len(passing)} passed", True)
+        if not passing:
+            self.iteration = self.iteration_limit
+            return
+
+        self.passed = True
+        self.iteration = min(passing, key=lambda it: (sum(points[it]), it))
+
+    def _run_search(self, fea):
+        """
+        Treat the changes as a single variable t (orig + t * change) and
+        search for the smallest t in [1, iteration_limit] where the objective
+        drops to <= 0. Every iteration is one solve, so the iteration limit
+        also caps the number of solves.
+        """
+        objective = self.objective
+        if not objective and self.checks:
+            objective = objective_from_check(self.checks[0])
+        if not objective:
+            self.log("Search mode needs an objective expression or a comparison check", True)
+            self.failed = True
+            return
+        self.log(f"Searching with objective {objective}", True)
+        try:
+            objective_code = compile_expr(objective)
+        except CheckError as e:
+            self.log(f"Invalid objective: {e}", True)
+            self.failed = True
+            return
+
+        self._pool = self._make_pool(fea, CpuScheduler(SCHEDULE_WIDE))
+        search = BracketSearch(1.0, self.iteration_limit, self.search_tolerance)
+
+        # NOTE: the best point is not necessarily the last one solved, keep
+        # every iteration in its own directory so its results stay around.
+        self._in_document(fea.setup_working_dir)
+        base_dir = fea.working_dir
+
+        # t -> (iteration, objective value, checks passed)
+        evaluated = {}
+        iteration = 0
+        while not search.done and iteration < self.iteration_limit:
+            self._check_cancel()
+            t = search.next_point()
+
+            # The search is deterministic, replay what was solved before resuming
+            rec = self._resumed.get(iteration)
+            if (rec is not None and rec["scale"] is not None and rec["objective"] is not None
+                    and abs(rec["scale"] - t) < 1e-9):
+                evaluated[t] = (iteration, rec["objective"], rec["passed"])
+                search.add_result(t, rec["objective"])
+                iteration += 1
+                continue
+
+            self._progress(int(float(iteration+1) / float(self.iteration_limit) * 100),
+                           f"Running iteration {iteration+1}, {t:.3f} steps")
+            self.log(f"Running iteration {iteration+1} at {t:.3f} steps", True)
+
+            working_dir = self._working_dir(base_dir, iteration)
+            inp_file_name = self.prepare_deck(fea, iteration, working_dir, scale=t)
+            if not inp_file_name:
+                self.failed = True
+                return
+
+            self.log("Solving...")
+            job = self._pool.submit(self.make_job(iteration, inp_file_name, t)).result()
+            self._check_cancel()
+            if job.aborted:
+                self._ccx_aborted(job)
+                raise BudgetExceeded("Search can't go on without the objective of every point")
+            if job.returncode:
+                self.log(f"CCX exited with code {job.returncode}: {job.stderr}", True)
+                self._unchecked(job)
+                self.failed = True
+                return
+
+            result = self.load_result(fea, job)
+            env = make_env(result, iteration)
+            try:
+                value = float(call_with_timeout(lambda: eval(objective_code, env), self.check_timeout))
+            except TimeoutError as e:
+                self._abort_iteration(job, f"objective {e}", result)
+                raise BudgetExceeded("Search can't go on without the objective of every point")
+            job.objective = value
+            self.log(f"Objective: {value}")
+            passed = self.check_result(result, job, env)
+
+            evaluated[t] = (iteration, value, passed)
+            search.add_result(t, value)
+            iteration += 1
+
+        best = search.result
+        if not search.done:
+            self.log("Search did not converge within the iteration limit", True)
+            # Fall back to the passing point closest to the boundary
+            passing = [t for (t, (_, value, _)) in evaluated.items() if value <= 0]
+            if passing:
+                best = max(passing, key=lambda t: evaluated[t][1])
+
+        if best is None:
+            self.iteration = self.iteration_limit
+            return
+
+        (self.iteration, _, self.passed) = evaluated[best]
+        self.log(f"Boundary found at {best:.3f} steps (iteration {self.iteration+1})", True)
+        if not self.passed:
+            self.log("Objective is satisfied but not all checks passed", True)
+
+    def run(self):
+        """
+        Run the whole iteration loop. The original property values are always
+        restored, even if the run was cancelled or failed.
+        """
+        if not self.profile_file_name:
+            self._run()
+            return
+
+        # NOTE: cProfile only sees the thread it is enabled on, which is the
+        # one everything but the ccx processes runs on.
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            self._run()
+        finally:
+            profiler.disable()
+            profiler.dump_stats(self.profile_file_name)
+            self.log(f"Profile written to {self.profile_file_name}")
+
+    def _make_fea(self):
+        fea = ccxtools.FemToolsCcx(analysis=self.analysis, solver=self.solver)
+        fea.purge_results()
+        fea.setup_ccx()
+        return fea
+
+    def _lock_document(self):
+        """
+        Resolve the changes and make their properties read-only for the run.
+        """
+        self._plan = ChangePlan(self._run_changes, max(self.iteration_limit, self.doe_levels))
+        self._plan.lock()
+        self._scoped_recompute = None
+        if self.scoped_recompute:
+            # NOTE: the mesh is made by the mesh phase, the analysis only groups
+            self._scoped_recompute = ScopedRecompute(FreeCAD.ActiveDocument, self.changes,
+                                                     (self.fem_mesh, self.analysis), self.log)
+
+    def _restore_document(self):
+        """
+        Put the original values, mesh settings and editable properties back.
+        """
+        if self._fidelity:
+            self._fidelity.restore()
+            self._fidelity = None
+        if self._plan:
+            self.log("Restoring original values...")
+            self._plan.revert(self.changes)
+            self._plan.unlock()
+            self._plan = None
+
+    def _run(self):
+        self._cancel_requested = False
+        self._out_of_time = False
+        self.iteration = 0
+        self.passed = False
+        self.failed = False
+        self.cancelled = False
+        self.timed_out = False
+        self.solution_values = None
+        self.result_summaries = {}
+        self.surrogate_errors = {}
+
+        print(f"Max iterations: {self.iteration_limit}")
+
+        start_time = time.time()
+        self._mesh_cache = MeshCache(self.mesh_cache_size)
+        self._retention = ResultRetention(self.keep_results, self.keep_results_count,
+                                          self.archive_dir, self.log)
+        self._timer = PhaseTimer()
+        if self.result_cache_size > 0:
+            cache_dir = self.result_cache_dir or os.path.join(
+                    FreeCAD.getUserAppDataDir(), "FEMIterate", "results")
+            self._result_cache = ResultCache(cache_dir, self.result_cache_size * 1024 * 1024)
+        else:
+            self._result_cache = None
+
+        self._scoped_recompute = None
+        self._deck_patcher = None
+        if self.patch_deck and self.changes and DeckPatcher.supports(self.changes):
+            self._deck_patcher = DeckPatcher(self.changes, inline=bool(self.spool_dir))
+
+        try:
+            self._compiled_checks = CompiledChecks(self.checks)
+            self._setup_fast_results()
+            self._setup_surrogate()
+            self._in_document(self._setup_fidelity)
+        except CheckError as e:
+            self.log(f"Invalid check {e}", True)
+            self.failed = True
+
+        try:
+            # NOTE: we pick out the analysis and solver ourselves because for
+            # some reason ccxtools did not find it at times. No idea why.
+            fea = self._in_document(self._make_fea)
+        # ccxtools throws raw Exceptions, not a lazy catch-all here
+        except Exception as e:
+            self.log(f"{e}", True)
+            self.failed = True
+
+        self._scratch = None
+        if not self.failed and self.scratch:
+            try:
+                self._in_document(fea.setup_working_dir)
+                self._persistent_dir = fea.working_dir
+                self._scratch = ScratchSpace(self.scratch_dir, self.scratch_size * 1024 * 1024, self.log)
+                self.log(f"Working directories are in {self._scratch.dir}")
+                self._retention.defer_archive = True
+            except OSError as e:
+                self.log(f"Could not set up the scratch directory, using the working directory: {e}", True)
+
+        if not self.failed:
+            self._setup_checkpoint()
+            try:
+                self._in_document(self._lock_document)
+            except ChangeError as e:
+                self.log(f"Invalid change {e}", True)
+                self.failed = True
+
+        if not self.failed and self.csv_file_name:
+            try:
+                self._result_log = ResultLog(self.csv_file_name,
+                                             self._plan.names,
+                                             self.checks, self._margin_codes is not None)
+                self.log(f"Writing results to {self.csv_file_name}")
+                for (it, rec) in sorted(self._resumed.items()):
+                    self._result_log.write(it, rec["values"], rec["checks"], {},
+                                           rec["margins"], rec["predicted"])
+            except OSError as e:
+                self.log(f"Could not open results file: {e}", True)
+
+        budget = None
+        if self.run_timeout > 0:
+            budget = threading.Timer(self.run_timeout, self._run_out_of_time)
+            budget.daemon = True
+            budget.start()
+
+        try:
+            if not self.failed:
+                if self.mode == MODE_SWEEP:
+                    self._run_sweep(fea)
+                elif self.mode == MODE_SEARCH:
+                    self._run_search(fea)
+                elif self.mode == MODE_DOE:
+                    self._run_doe(fea)
+                else:
+                    self._run_sequential(fea)
+
+                if self._fast_fields is not None:
+                    self._load_final_result(fea)
+        except CalculationCancelled:
+            self.cancelled = True
+            self.log("Cancelled", True)
+        except BudgetExceeded as e:
+            self.timed_out = True
+            self.log(f"{e}", True)
+        # User expressions and FreeCAD can throw anything, make sure we still
+        # get to restore the original values below.
+        except Exception as e:
+            self.log(f"{e}", True)
+            self.failed = True
+        finally:
+            if budget is not None:
+                budget.cancel()
+            if self._pool:
+                self._pool.kill_all()
+                self._pool.shutdown()
+                self._pool = None
+            # Drop the cached meshes, they can be large
+            self._mesh_cache = None
+            if self._result_log:
+                self._result_log.close()
+                self._result_log = None
+
+        # NOTE: before finish(), which moves the files of the evicted iterations away
+        if self._scratch:
+            self._promote_files()
+        self._in_document(self._retention.finish, self.iteration if self.passed else None)
+        self.result_summaries = {it: ev["summary"] for (it, ev) in self._retention.evicted.items()}
+
+        if self.passed:
+            if self.iteration in self._jobs:
+                self.solution_values = self._jobs[self.iteration].values
+            elif self.iteration in self._resumed:
+                self.solution_values = self._resumed[self.iteration]["values"]
+            self.log("All checks passed!")
+        elif self.iteration == self.iteration_limit:
+            self.log("Hit iteration limit without finding a solution", True)
+
+        if self.failed:
+            self.log("Had an error!", True)
+
+        if self._checkpoint:
+            # Cancelled, failed and timed out runs can be resumed later
+            if self.cancelled or self.failed or self.timed_out:
+                self._checkpoint.close()
+            else:
+                self._checkpoint.finish(self.passed, self.iteration, self.solution_values)
+            self._checkpoint = None
+        if self.passed and self.solution_values:
+            try:
+                save_solution(self.warm_start_file, self.changes, self.solution_values)
+            except OSError as e:
+                self.log(f"Could not save the warm start values: {e}")
+
+        if self._scratch:
+            self._scratch.close()
+            self._scratch = None
+
+        self._in_document(self._restore_document)
+
+        # Iterations a cancelled or stopped run was in the middle of
+        self._timer.pop_all()
+        summary = self._timer.summary()
+        if summary:
+            self.log("Phase timings:", True)
+            for line in summary:
+                self.log(line)
+
+        self.elapsed_time = round(time.time() - start_time, 1)
+        print(f"Solving finished in {self.elapsed_time} s")
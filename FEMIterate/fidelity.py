@@ -0,0 +1,67 @@
+"""
+Coarse meshes for the exploring iterations of multi-fidelity runs.
+"""
+
+# Mesh object properties scaled to coarsen the mesh
+COARSENED_PROPERTIES = ("CharacteristicLengthMax", "CharacteristicLengthMin")
+
+
+def node_spacing(mesh_obj):
+    """
+    Estimate the element size of the current mesh from the volume of the
+    meshed shape and the number of nodes in it.
+
+    @returns the mean spacing of the nodes in mm
+    @raises ValueError saying why it can't be estimated
+    """
+    mesh = getattr(mesh_obj, "FemMesh", None)
+    nodes = mesh.NodeCount if mesh is not None else 0
+    if not nodes:
+        raise ValueError("the mesh has not been created yet")
+    part = getattr(mesh_obj, "Part", None)
+    volume = float(part.Shape.Volume) if part is not None and hasattr(part, "Shape") else 0.0
+    if volume <= 0.0:
+        raise ValueError("the meshed shape is not a solid")
+    return (volume / nodes) ** (1.0 / 3.0)
+
+
+class MeshFidelity():
+    """
+    Switches the mesh object between its own settings and ones with the
+    characteristic lengths scaled by factor. The mesh cache keeps both
+    meshes apart since they differ in these properties.
+
+    A maximum size of 0 leaves the element size to Gmsh, the coarse mesh
+    then gets factor times the node spacing of the current mesh as maximum.
+    """
+    def __init__(self, mesh_obj, factor):
+        self.mesh_obj = mesh_obj
+        self.factor = factor
+        self._orig = {p: getattr(mesh_obj, p) for p in COARSENED_PROPERTIES
+                      if p in mesh_obj.PropertiesList}
+        self.coarse = False
+        # Node spacing of the automatically sized mesh, or why coarsening is not possible
+        self.auto_size = None
+        self.unsupported = None
+        if "CharacteristicLengthMax" not in self._orig:
+            self.unsupported = "the mesh has no maximum element size"
+        elif float(self._orig["CharacteristicLengthMax"]) <= 0.0:
+            try:
+                self.auto_size = node_spacing(mesh_obj)
+            except ValueError as e:
+                self.unsupported = f"the element size is automatic and {e}"
+
+    def set_coarse(self, coarse):
+        if coarse == self.coarse:
+            return
+        for (prop, value) in self._orig.items():
+            if not coarse:
+                setattr(self.mesh_obj, prop, value)
+            elif prop == "CharacteristicLengthMax" and self.auto_size:
+                setattr(self.mesh_obj, prop, self.auto_size * self.factor)
+            else:
+                setattr(self.mesh_obj, prop, value * self.factor)
+        self.coarse = coarse
+
+    def restore(self):
+        self.set_coarse(False)
@@ -0,0 +1,168 @@
+import mmap
+import numpy as np
+import os
+
+
+class FrdError(Exception):
+    pass
+
+
+# FRD stress/strain component order is XX YY ZZ XY YZ ZX
+_TENSOR_COLUMNS = {"XX": 0, "YY": 1, "ZZ": 2, "XY": 3, "YZ": 4, "XZ": 5}
+
+
+def _von_mises(s):
+    xx, yy, zz, xy, yz, zx = s.T
+    return np.sqrt(0.5 * ((xx - yy) ** 2 + (yy - zz) ** 2 + (zz - xx) ** 2)
+                   + 3.0 * (xy ** 2 + yz ** 2 + zx ** 2))
+
+
+def _principals(s):
+    """
+    @returns (n, 3) principal values, largest first
+    """
+    xx, yy, zz, xy, yz, zx = s.T
+    tensors = np.empty((len(s), 3, 3))
+    tensors[:, 0, 0] = xx
+    tensors[:, 1, 1] = yy
+    tensors[:, 2, 2] = zz
+    tensors[:, 0, 1] = tensors[:, 1, 0] = xy
+    tensors[:, 1, 2] = tensors[:, 2, 1] = yz
+    tensors[:, 0, 2] = tensors[:, 2, 0] = zx
+    return np.linalg.eigvalsh(tensors)[:, ::-1]
+
+
+def _column(i):
+    return lambda v: v[:, i]
+
+
+# FreeCAD result object field -> (FRD block, function of the block values)
+FIELDS = {
+    "vonMises": ("STRESS", _von_mises),
+    "PrincipalMax": ("STRESS", lambda s: _principals(s)[:, 0]),
+    "PrincipalMed": ("STRESS", lambda s: _principals(s)[:, 1]),
+    "PrincipalMin": ("STRESS", lambda s: _principals(s)[:, 2]),
+    "MaxShear": ("STRESS", lambda s: (lambda p: (p[:, 0] - p[:, 2]) / 2.0)(_principals(s))),
+    "DisplacementVectors": ("DISP", lambda d: d[:, :3]),
+    "DisplacementLengths": ("DISP", lambda d: np.linalg.norm(d[:, :3], axis=1)),
+    "Temperature": ("NDTEMP", _column(0)),
+    "PeeqValues": ("PE", _column(0)),
+}
+for (_suffix, _col) in _TENSOR_COLUMNS.items():
+    FIELDS[f"NodeStress{_suffix}"] = ("STRESS", _column(_col))
+    FIELDS[f"NodeStrain{_suffix}"] = ("TOSTRAIN", _column(_col))
+
+
+def supports_fields(fields):
+    return all(f in FIELDS for f in fields)
+
+
+def _find_blocks(mm, names):
+    """
+    @returns {block name: (data start, data end)} of the last occurrence of
+             every wanted block, i.e. the last increment
+    """
+    blocks = {}
+    pos = 0
+    while True:
+        pos = mm.find(b"\n -4  ", pos)
+        if pos < 0:
+            break
+        line_end = mm.find(b"\n", pos + 1)
+        name = mm[pos + 6:pos + 14].strip().decode(errors="replace")
+        end = mm.find(b"\n -3", line_end)
+        if end < 0:
+            raise FrdError(f"Unterminated {name} block")
+        if name in names:
+            blocks[name] = (line_end + 1, end + 1)
+        pos = end
+    return blocks
+
+
+def _parse_block(data):
+    """
+    Parse the " -1" node records of an ASCII (short or long format) block.
+
+    @returns (node numbers, (n, components) values)
+    """
+    lines = [l for l in data.split(b"\n") if l.startswith((b" -1", b" -2"))]
+    if not lines:
+        raise FrdError("No ASCII node records, binary .frd files are not supported")
+
+    # Records with more than 6 components continue on " -2" lines
+    if any(l.startswith(b" -2") for l in lines):
+        merged = []
+        for l in lines:
+            if l.startswith(b" -2"):
+                merged[-1] += l[13:].rstrip(b"\r")
+            else:
+                merged.append(l.rstrip(b"\r"))
+        lines = merged
+
+    first = lines[0].rstrip(b"\r")
+    # Long format has a 10 character node number, short format 5
+    node_width = 10 if (len(first) - 13) % 12 == 0 else 5
+    ncomps = (len(first) - 3 - node_width) // 12
+    width = 3 + node_width + 12 * ncomps
+
+    raw = np.array([l[:width].ljust(width) for l in lines], dtype=f"S{width}")
+    chars = raw.view("S1").reshape(len(lines), width)
+
+    def column(start, length):
+        return np.ascontiguousarray(chars[:, start:start + length]).view(f"S{length}").ravel()
+
+    nodes = column(3, node_width).astype(int)
+    values = np.empty((len(lines), ncomps))
+    for c in range(ncomps):
+        values[:, c] = column(3 + node_width + 12 * c, 12).astype(float)
+    return (nodes, values)
+
+
+class FrdResult():
+    """
+    Stand-in for a FreeCAD result object with only the requested fields,
+    all as NumPy arrays in node order.
+    """
+    def __init__(self, label):
+        self.Label = label
+        self.NodeNumbers = None
+
+
+def read_frd(path, fields, label="FrdResult"):
+    """
+    Read just the given result fields from a CalculiX .frd file. Blocks
+    that no field needs are skipped without being parsed.
+
+    @raises FrdError if a field is unknown or the file can't be read
+    """
+    unknown = [f for f in fields if f not in FIELDS]
+    if unknown:
+        raise FrdError(f"Unsupported fields: {', '.join(unknown)}")
+
+    block_names = {FIELDS[f][0] for f in fields}
+    result = FrdResult(label)
+
+    if not os.path.isfile(path) or os.path.getsize(path) == 0:
+        raise FrdError(f"{path} has no results")
+
+    with open(path, "rb") as f:
+        # NOTE: mmap so only the pages of the wanted blocks are actually read
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm.find(b"\n    1PSTEP") < 0 and mm.find(b"\n -4  ") < 0:
+                raise FrdError(f"{path} has no results")
+            blocks = _find_blocks(mm, block_names)
+
+            missing = block_names - set(blocks)
+            if missing:
+                raise FrdError(f"{path} is missing blocks {', '.join(sorted(missing))}")
+
+            parsed = {}
+            for (name, (start, end)) in blocks.items():
+                parsed[name] = _parse_block(mm[start:end])
+
+    for field in fields:
+        (block, fn) = FIELDS[field]
+        (nodes, values) = parsed[block]
+        setattr(result, field, fn(values))
+        result.NodeNumbers = nodes
+    return result
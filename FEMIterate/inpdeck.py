@@ -0,0 +1,229 @@
+"""
+Incremental .inp deck writer for runs that only change load and boundary
+condition magnitudes.
+
+The first deck of a run is written by ccxtools as usual and then split up:
+everything that does not depend on the changed properties (nodes, elements,
+sets, ...) goes into include files, the cards of the changed constraints
+are kept in memory. Later decks are a small main file that includes the
+static parts and has the constraint values scaled to the new magnitudes.
+"""
+import FreeCAD
+import hashlib
+import os
+
+# ccx reads at most this many characters of an input line
+MAX_LINE_LENGTH = 132
+
+
+def _single_prop(prop, nfields):
+    return lambda fields: prop if len(fields) == nfields else None
+
+
+def _dof_prop(props):
+    return lambda fields: props.get(fields[1].strip()) if len(fields) == 4 else None
+
+
+# Object TypeId -> {card keyword: function(data line fields) -> property the
+# last field of the line is proportional to, or None}
+PATCHABLE = {
+    "Fem::ConstraintForce": {
+        "CLOAD": _single_prop("Force", 3),
+    },
+    "Fem::ConstraintPressure": {
+        "DLOAD": _single_prop("Pressure", 3),
+    },
+    "Fem::ConstraintDisplacement": {
+        "BOUNDARY": _dof_prop({"1": "xDisplacement", "2": "yDisplacement", "3": "zDisplacement",
+                               "4": "xRotation", "5": "yRotation", "6": "zRotation"}),
+    },
+    "Fem::ConstraintTemperature": {
+        "BOUNDARY": _dof_prop({"11": "Temperature"}),
+        "CFLUX": _single_prop("CFlux", 3),
+    },
+}
+
+PATCHABLE_PROPS = {
+    "Fem::ConstraintForce": {"Force"},
+    "Fem::ConstraintPressure": {"Pressure"},
+    "Fem::ConstraintDisplacement": {"xDisplacement", "yDisplacement", "zDisplacement",
+                                    "xRotation", "yRotation", "zRotation"},
+    "Fem::ConstraintTemperature": {"Temperature", "CFlux"},
+}
+
+
+class DeckPatcher():
+    """
+    @param inline copy the static parts into every deck instead of including
+                  them, for decks that are run somewhere else
+    """
+    def __init__(self, changes, inline=False):
+        self.changes = changes
+        self.inline = inline
+        self.ready = False
+        self.job_name = None
+        # Static include file names and in-memory sections, in deck order.
+        # Section lines are either plain strings or (prefix, value, key).
+        self._parts = []
+        # (object name, property) -> value the base deck was written with
+        self._base_values = {}
+
+    @staticmethod
+    def supports(changes):
+        """
+        @returns True if none of the changes needs a full deck rewrite
+        """
+        doc = FreeCAD.ActiveDocument
+        for (objname, props) in changes.items():
+            obj = doc.getObject(objname)
+            if obj is None or obj.TypeId not in PATCHABLE_PROPS:
+                return False
+            if not set(props) <= PATCHABLE_PROPS[obj.TypeId]:
+                return False
+        return True
+
+    def set_base(self, inp_file_name):
+        """
+        Split a deck written by ccxtools into static include files and the
+        sections that are patched later on.
+
+        @returns True if all the changed constraints were found in the deck
+        """
+        doc = FreeCAD.ActiveDocument
+        labels = {obj.Label: obj for obj in doc.Objects}
+        changed = {doc.getObject(name).Label for name in self.changes}
+
+        working_dir, inp_name = os.path.split(inp_file_name)
+        self.job_name = os.path.splitext(inp_name)[0]
+        self._parts = []
+        digest = hashlib.sha1()
+
+        tmp_names = []
+        static = None
+        section = None
+        found = set()
+
+        def new_static():
+            tmp_name = os.path.join(working_dir, f"{self.job_name}_base{len(tmp_names)}.tmp")
+            tmp_names.append(tmp_name)
+            self._parts.append(len(tmp_names) - 1)
+            return open(tmp_name, "w")
+
+        label = None
+        keyword = None
+        static = new_static()
+        with open(inp_file_name) as f:
+            for line in f:
+                digest.update(line.encode())
+
+                if line.startswith("***"):
+                    label = None
+                elif line.startswith("**"):
+                    text = line[2:].strip()
+                    if text in labels:
+                        obj = labels[text]
+                        label = obj if text in changed else None
+                elif line.startswith("*"):
+                    keyword = line[1:].split(",")[0].strip().upper()
+                    if label is not None and keyword not in PATCHABLE[label.TypeId]:
+                        label = None
+
+                # Comments inside a section stay in it, it starts at the first data line
+                is_data = not line.startswith("*")
+                in_section = (label is not None and keyword in PATCHABLE[label.TypeId]
+                              and (is_data or line.startswith("**")))
+                if in_section and section is None and not (is_data and line.strip()):
+                    in_section = False
+                if in_section and section is None:
+                    static.close()
+                    section = []
+                    self._parts.append(section)
+                elif not in_section and section is not None:
+                    section = None
+                    static = new_static()
+
+                if section is None:
+                    static.write(line)
+                    continue
+
+                fields = line.strip().split(",")
+                prop = PATCHABLE[label.TypeId][keyword](fields) if is_data and fields[0] else None
+                try:
+                    value = float(fields[-1])
+                except ValueError:
+                    prop = None
+                if prop is None:
+                    section.append(line)
+                    continue
+
+                key = (label.Name, prop)
+                section.append((",".join(fields[:-1]) + ",", value, key))
+                found.add(label.Label)
+        static.close()
+
+        # NOTE: the digest makes the include names unique per base deck, so
+        # the result cache never mixes up decks of different meshes
+        stamp = digest.hexdigest()[:12]
+        for (n, tmp_name) in enumerate(tmp_names):
+            name = os.path.join(working_dir, f"{self.job_name}_{stamp}_{n}.inc")
+            os.replace(tmp_name, name)
+            tmp_names[n] = name
+        self._parts = [tmp_names[p] if isinstance(p, int) else p for p in self._parts]
+
+        self._base_values = {}
+        for (objname, props) in self.changes.items():
+            obj = doc.getObject(objname)
+            for prop in props:
+                self._base_values[(objname, prop)] = float(getattr(obj, prop))
+
+        self.ready = found == changed
+        return self.ready
+
+    def _ratios(self):
+        """
+        @returns {(object name, property): new / base value} or None if a
+                 base value was zero and can't be scaled
+        """
+        doc = FreeCAD.ActiveDocument
+        ratios = {}
+        for ((objname, prop), base) in self._base_values.items():
+            value = float(getattr(doc.getObject(objname), prop))
+            if base == 0.0:
+                if value != 0.0:
+                    return None
+                ratios[(objname, prop)] = 1.0
+            else:
+                ratios[(objname, prop)] = value / base
+        return ratios
+
+    def write(self, working_dir):
+        """
+        Write a deck with the current property values into working_dir.
+
+        @returns .inp file name or None if a full rewrite is needed
+        """
+        ratios = self._ratios()
+        if ratios is None:
+            return None
+
+        os.makedirs(working_dir, exist_ok=True)
+        inp_file_name = os.path.join(working_dir, self.job_name + ".inp")
+        with open(inp_file_name, "w") as f:
+            for part in self._parts:
+                if not isinstance(part, str):
+                    for line in part:
+                        if isinstance(line, str):
+                            f.write(line)
+                        else:
+                            (prefix, value, key) = line
+                            f.write(f"{prefix}{value * ratios[key]:.13E}\n")
+                    continue
+
+                include = f"*INCLUDE,INPUT={os.path.relpath(part, working_dir)}\n"
+                if self.inline or "," in include[15:] or len(include) > MAX_LINE_LENGTH:
+                    with open(part) as static:
+                        for chunk in iter(lambda: static.read(1 << 20), ""):
+                            f.write(chunk)
+                else:
+                    f.write(include)
+        return inp_file_name
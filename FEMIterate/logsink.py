@@ -0,0 +1,79 @@
+"""
+Buffer between the engine and the log widget. The engine thread only
+appends to a bounded ring, the GUI drains it at a capped rate so a fast
+sweep can't flood the Qt event loop or the text widget.
+"""
+from logging.handlers import RotatingFileHandler
+import collections
+import html
+import logging
+import threading
+
+# Messages buffered between two flushes, older ones are dropped
+LOG_RING_SIZE = 500
+# Seconds between flushes to the widget
+LOG_FLUSH_INTERVAL = 0.2
+LOG_FILE_MAX_BYTES = 4 * 1024 * 1024
+LOG_FILE_BACKUPS = 3
+
+
+class LogSink():
+    def __init__(self, file_name=None, ring_size=LOG_RING_SIZE):
+        self._lock = threading.Lock()
+        self._ring = collections.deque(maxlen=ring_size)
+        self._dropped = 0
+        self._progress = None
+
+        self._file_logger = None
+        if file_name:
+            handler = RotatingFileHandler(file_name, maxBytes=LOG_FILE_MAX_BYTES,
+                                          backupCount=LOG_FILE_BACKUPS, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            # NOTE: not registered with the logging module, every sink owns its file
+            self._file_logger = logging.Logger(f"FEMIterate.{id(self)}")
+            self._file_logger.addHandler(handler)
+
+    def log(self, msg, important=False):
+        """
+        Safe to call from any thread.
+        """
+        with self._lock:
+            if len(self._ring) == self._ring.maxlen:
+                self._dropped += 1
+            self._ring.append((msg, important))
+        if self._file_logger:
+            self._file_logger.warning(f"** {msg}" if important else msg)
+
+    def progress(self, percent, text):
+        """
+        Only the latest progress is kept until the next flush.
+        """
+        with self._lock:
+            self._progress = (percent, text)
+
+    def take(self):
+        """
+        @returns ([HTML line], progress or None) since the last call
+        """
+        with self._lock:
+            messages = list(self._ring)
+            dropped = self._dropped
+            progress = self._progress
+            self._ring.clear()
+            self._dropped = 0
+            self._progress = None
+
+        lines = []
+        if dropped:
+            lines.append(f"<i>... {dropped} messages skipped</i>")
+        for (msg, important) in messages:
+            msg = html.escape(msg)
+            lines.append(f"<b>{msg}</b>" if important else msg)
+        return (lines, progress)
+
+    def close(self):
+        if self._file_logger:
+            for handler in list(self._file_logger.handlers):
+                handler.close()
+                self._file_logger.removeHandler(handler)
+            self._file_logger = None
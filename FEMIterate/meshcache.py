@@ -0,0 +1,76 @@
+from collections import OrderedDict
+from femmesh.gmshtools import GmshTools
+import hashlib
+
+# Mesh object properties which are outputs or cosmetic and don't affect meshing
+IGNORED_MESH_PROPERTIES = {
+    "FemMesh",
+    "Label",
+    "Label2",
+    "Visibility",
+    "ExpressionEngine",
+}
+
+
+def _hash_properties(h, obj):
+    for prop in sorted(obj.PropertiesList):
+        if prop in IGNORED_MESH_PROPERTIES:
+            continue
+        h.update(prop.encode())
+        h.update(str(getattr(obj, prop)).encode())
+
+
+def mesh_key(mesh_obj):
+    """
+    Hash everything that goes into Gmsh: the shape of the meshed part, the
+    mesh object settings and the settings of the mesh regions, boundary
+    layers etc. linked to it.
+    """
+    h = hashlib.sha1()
+    part = mesh_obj.Part
+    if part is not None:
+        h.update(part.Shape.exportBrepToString().encode())
+
+    _hash_properties(h, mesh_obj)
+    for linked in mesh_obj.OutList:
+        if linked is not part:
+            h.update(linked.Name.encode())
+            _hash_properties(h, linked)
+
+    return h.hexdigest()
+
+
+class MeshCache():
+    """
+    Skips Gmsh when the inputs of the mesh did not change since the last
+    mesh and restores earlier meshes of the same inputs instead of meshing
+    them again. At most max_entries meshes are kept, least recently used
+    ones are dropped first.
+    """
+    def __init__(self, max_entries=4):
+        self.max_entries = max_entries
+        self._meshes = OrderedDict()
+        self._current_key = None
+
+    def update_mesh(self, mesh_obj, log=print):
+        if self.max_entries <= 0:
+            GmshTools(mesh_obj).create_mesh()
+            return
+
+        key = mesh_key(mesh_obj)
+
+        if key == self._current_key:
+            log("Geometry and mesh settings unchanged, reusing mesh")
+        elif key in self._meshes:
+            log("Restoring cached mesh")
+            mesh_obj.FemMesh = self._meshes[key]
+        else:
+            # NOTE: a new GmshTools every time, it reads the mesh settings
+            # from the mesh object in its constructor.
+            GmshTools(mesh_obj).create_mesh()
+            self._meshes[key] = mesh_obj.FemMesh.copy()
+
+        self._current_key = key
+        self._meshes.move_to_end(key)
+        while len(self._meshes) > self.max_entries:
+            self._meshes.popitem(last=False)
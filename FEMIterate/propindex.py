@@ -0,0 +1,40 @@
+"""
+Property name lookup for the Add Change dialog.
+"""
+
+
+class NameIndex():
+    """
+    Case-insensitive substring search over property names. Queries of three
+    or more characters only look at the names sharing all their trigrams,
+    and a query that extends the previous one only filters its matches.
+    """
+    def __init__(self, names):
+        self.names = list(names)
+        self._lower = [n.lower() for n in self.names]
+        self._grams = {}
+        for (i, name) in enumerate(self._lower):
+            for k in range(len(name) - 2):
+                self._grams.setdefault(name[k:k+3], set()).add(i)
+        self._last = ("", None)
+
+    def search(self, text):
+        """
+        @returns indexes of the names containing text, in their original order
+        """
+        text = text.lower()
+        if not text:
+            return list(range(len(self.names)))
+
+        (last_text, last_matches) = self._last
+        if last_matches is not None and last_text in text:
+            candidates = last_matches
+        elif len(text) >= 3:
+            grams = sorted((self._grams.get(text[k:k+3], set()) for k in range(len(text) - 2)), key=len)
+            candidates = grams[0].intersection(*grams[1:])
+        else:
+            candidates = range(len(self.names))
+
+        matches = sorted(i for i in candidates if text in self._lower[i])
+        self._last = (text, matches)
+        return matches
@@ -0,0 +1,64 @@
+"""
+Recompute only the part of the document the changes can affect.
+"""
+
+
+def dependents(objects, stop=()):
+    """
+    @param stop names of objects that are not included nor followed
+    @returns the objects and all objects depending on them through InList
+    """
+    found = {}
+    stack = list(objects)
+    while stack:
+        obj = stack.pop()
+        if obj.Name in found or obj.Name in stop:
+            continue
+        found[obj.Name] = obj
+        stack.extend(obj.InList)
+    return list(found.values())
+
+
+class ScopedRecompute():
+    """
+    Recomputes the changed objects and everything depending on them. FreeCAD
+    adds what those depend on (their OutList closure) by itself and only
+    executes the touched objects of it. The whole document is recomputed
+    if the scoped one leaves anything invalid, or FreeCAD is too old to
+    take a list of objects.
+    """
+    def __init__(self, doc, changes, stop=(), log=None):
+        self.doc = doc
+        changed = [doc.getObject(name) for name in changes]
+        self.objects = dependents([o for o in changed if o is not None], {o.Name for o in stop})
+        self.log = log
+        self.enabled = True
+
+    def _needs_full(self):
+        for obj in self.objects:
+            if "Invalid" in obj.State or obj.isTouched():
+                return True
+        return False
+
+    def recompute(self):
+        if not self.enabled:
+            self.doc.recompute()
+            return
+
+        try:
+            self.doc.recompute(self.objects)
+        except TypeError:
+            if self.log:
+                self.log("This FreeCAD can't recompute single objects, recomputing everything")
+            self.enabled = False
+            self.doc.recompute()
+            return
+        if not self._needs_full():
+            return
+
+        self.doc.recompute()
+        if self._needs_full():
+            # Broken either way, don't pay for two recomputes every iteration
+            self.enabled = False
+        elif self.log:
+            self.log("Recompute of the changed objects was incomplete, recomputed everything")
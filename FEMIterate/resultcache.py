@@ -0,0 +1,132 @@
+from FreeCAD import Units
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+# ccx outputs needed by ccxtools.load_results()
+CACHED_EXTENSIONS = [".frd", ".dat"]
+
+# Solver properties that are not settings of the solve
+KEY_SKIPPED_PROPERTIES = {"Label", "Label2", "Visibility", "ExpressionEngine", "Proxy"}
+
+
+def _setting_str(value):
+    """
+    @returns str of a solver setting, None for object references and other
+             values whose str() is not the same in every session
+    """
+    if isinstance(value, (list, tuple)):
+        items = [_setting_str(v) for v in value]
+        return None if None in items else f"[{', '.join(items)}]"
+    if isinstance(value, (bool, int, float, str, Units.Quantity)):
+        return str(value)
+    return None
+
+
+def cache_key(inp_file_name, applied_values, solver_obj, ccx_binary):
+    """
+    Content address of a solve: the written deck, the property values the
+    deck was written with, the solver object settings and the ccx binary.
+    """
+    h = hashlib.sha256()
+    h.update(ccx_binary.encode())
+    with open(inp_file_name, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+
+    h.update(json.dumps(applied_values, sort_keys=True).encode())
+
+    if solver_obj is not None:
+        for prop in sorted(solver_obj.PropertiesList):
+            if prop in KEY_SKIPPED_PROPERTIES:
+                continue
+            value = _setting_str(getattr(solver_obj, prop))
+            if value is None:
+                continue
+            h.update(prop.encode())
+            h.update(value.encode())
+
+    return h.hexdigest()
+
+
+class ResultCache():
+    """
+    On-disk cache of ccx results, one directory per cache key. Entries are
+    evicted least recently used first once the cache grows over max_bytes.
+    """
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+
+    def _entry_dir(self, key):
+        return os.path.join(self.path, key)
+
+    def restore(self, key, working_dir, job_name):
+        """
+        Copy cached results into the working directory as if ccx wrote them.
+
+        @returns True on a cache hit
+        """
+        entry = self._entry_dir(key)
+        with self._lock:
+            if not os.path.isdir(entry):
+                return False
+            for ext in CACHED_EXTENSIONS:
+                src = os.path.join(entry, "result" + ext)
+                if os.path.isfile(src):
+                    shutil.copyfile(src, os.path.join(working_dir, job_name + ext))
+            # Mark as recently used
+            os.utime(entry)
+        return True
+
+    def store(self, key, working_dir, job_name):
+        entry = self._entry_dir(key)
+        if os.path.isdir(entry):
+            return
+
+        # Copy into a temporary directory first so a half written entry is
+        # never picked up by restore()
+        tmp = tempfile.mkdtemp(dir=self.path, prefix=".tmp-")
+        try:
+            for ext in CACHED_EXTENSIONS:
+                src = os.path.join(working_dir, job_name + ext)
+                if os.path.isfile(src):
+                    shutil.copyfile(src, os.path.join(tmp, "result" + ext))
+            with self._lock:
+                os.rename(tmp, entry)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            # Someone else stored the same key, fine
+            if not os.path.isdir(entry):
+                raise
+
+        self.evict()
+
+    def evict(self):
+        with self._lock:
+            entries = []
+            total = 0
+            for name in os.listdir(self.path):
+                entry = os.path.join(self.path, name)
+                if name.startswith(".") or not os.path.isdir(entry):
+                    continue
+                size = sum(os.path.getsize(os.path.join(entry, f)) for f in os.listdir(entry))
+                entries.append((os.path.getmtime(entry), size, entry))
+                total += size
+
+            entries.sort()
+            for (_, size, entry) in entries:
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= size
+
+    def clear(self):
+        with self._lock:
+            for name in os.listdir(self.path):
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
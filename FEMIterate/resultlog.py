@@ -0,0 +1,55 @@
+from .timing import PHASES
+import csv
+
+
+class ResultLog():
+    """
+    Writes one CSV row per finished iteration. Every row is flushed right
+    away so the file can be followed while the run is going and nothing is
+    lost if FreeCAD goes down mid-run.
+    """
+    def __init__(self, path, value_names, checks, margins=False):
+        """
+        @param margins add the check margins and their surrogate predictions
+        """
+        self.path = path
+        self.value_names = list(value_names)
+        self.checks = list(checks)
+        self.margins = margins
+
+        self._file = open(path, "w", newline="")
+        self._writer = csv.writer(self._file)
+
+        header = ["iteration"] + self.value_names
+        for expr in self.checks:
+            header += [f"{expr} [value]", f"{expr} [passed]"]
+        if margins:
+            for expr in self.checks:
+                header += [f"{expr} [margin]", f"{expr} [predicted margin]"]
+        header += [f"{p} [s]" for p in PHASES]
+        self._writer.writerow(header)
+        self._file.flush()
+
+    def write(self, iteration, values, check_results, timings, margins=None, predicted=None):
+        """
+        @param values {name: value} of the changed properties
+        @param check_results [(value, passed)] in the order of the checks
+        @param timings {phase: seconds}
+        @param margins check margins, <= 0 passes
+        @param predicted surrogate prediction of the margins
+        """
+        row = [iteration]
+        row += [values.get(name, "") for name in self.value_names]
+        for (value, passed) in check_results:
+            row += [value, passed]
+        if self.margins:
+            for n in range(len(self.checks)):
+                row += [margins[n] if margins is not None else "",
+                        predicted[n] if predicted is not None else ""]
+        row += [round(timings[p], 3) if p in timings else "" for p in PHASES]
+
+        self._writer.writerow(row)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,186 @@
+"""
+Keeps the number of FEM result objects in the document bounded.
+
+Evicted iterations are reduced to a few scalars per result field, their
+.frd/.dat files are moved into an archive directory so the full results
+can still be opened later. Results still in the document keep their files
+where they are. Iterations with working directories of their own (scratch
+directories) are only archived at the end of the run.
+"""
+import FreeCAD
+import json
+import numpy as np
+import os
+import shutil
+
+RETAIN_ALL = "All"
+RETAIN_LAST = "Last"
+RETAIN_SOLUTION = "Solution"
+RETAIN_SUMMARY = "Summary"
+RETENTIONS = [RETAIN_ALL, RETAIN_LAST, RETAIN_SOLUTION, RETAIN_SUMMARY]
+
+# Result object fields which are summarized on eviction
+SUMMARY_FIELDS = [
+    "vonMises", "MaxShear", "PrincipalMax", "PrincipalMin",
+    "DisplacementLengths", "Temperature", "PeeqValues",
+]
+
+ARCHIVED_EXTENSIONS = [".frd", ".dat"]
+
+
+def summarize(result):
+    """
+    @returns {field: {"min": .., "max": .., "mean": ..}} of the non-empty fields
+    """
+    summary = {}
+    for field in SUMMARY_FIELDS:
+        values = getattr(result, field, None)
+        if values is None or len(values) == 0:
+            continue
+        values = np.asarray(values, dtype=float)
+        summary[field] = {
+            "min": float(np.min(values)),
+            "max": float(np.max(values)),
+            "mean": float(np.mean(values)),
+        }
+    return summary
+
+
+class ResultRetention():
+    """
+    @param policy one of RETENTIONS
+    @param keep result objects kept by RETAIN_LAST
+    @param archive_dir where the result files of evicted iterations go
+    @param defer_archive the iterations have working directories of their
+           own, move the files of the evicted ones at finish() only
+    """
+    def __init__(self, policy, keep, archive_dir, log=None, defer_archive=False):
+        self.policy = policy
+        self.keep = max(1, keep)
+        self.archive_dir = archive_dir
+        self.log = log
+        self.defer_archive = defer_archive
+        # iteration -> result object still in the document, in insertion order
+        self._results = {}
+        self._passed = set()
+        # iteration -> {"summary": .., "files": [archived files]}
+        self.evicted = {}
+        self._archived = {}
+        # iteration -> job of the evicted iterations whose files are not archived yet
+        self._unarchived = {}
+        # iteration -> job of the results in the document
+        self._jobs = {}
+        # working directory -> iteration whose files are in it
+        self._dir_owners = {}
+
+    def has(self, iteration):
+        return iteration in self._results
+
+    def _archive(self, iteration, job):
+        """
+        Move the result files of an evicted iteration out of its working
+        directory.
+        """
+        os.makedirs(self.archive_dir, exist_ok=True)
+        files = []
+        for ext in ARCHIVED_EXTENSIONS:
+            src = os.path.join(job.working_dir, job.job_name + ext)
+            if os.path.isfile(src):
+                dst = os.path.join(self.archive_dir, f"iteration{iteration}{ext}")
+                shutil.move(src, dst)
+                files.append(dst)
+        self._archived[iteration] = files
+
+    def restore_files(self, iteration, job):
+        """
+        Put the archived result files of an iteration back next to its deck.
+
+        @returns True if there was anything to restore
+        """
+        files = self._archived.get(iteration)
+        if not files:
+            return False
+        # The working directory may have been cleaned up in the meantime
+        os.makedirs(job.working_dir, exist_ok=True)
+        for src in files:
+            ext = os.path.splitext(src)[1]
+            shutil.copyfile(src, os.path.join(job.working_dir, job.job_name + ext))
+        return True
+
+    def _evict(self, iteration):
+        result = self._results.pop(iteration)
+        job = self._jobs.pop(iteration, None)
+        if job is not None and self.defer_archive:
+            self._unarchived[iteration] = job
+        elif job is not None and self._dir_owners.get(job.working_dir) == iteration:
+            self._archive(iteration, job)
+        # NOTE: otherwise a later iteration reused the working directory and
+        # its files are gone already
+        self.evicted[iteration] = {
+            "summary": summarize(result),
+            "files": self._archived.get(iteration, []),
+        }
+
+        doc = FreeCAD.ActiveDocument
+        mesh = getattr(result, "Mesh", None)
+        doc.removeObject(result.Name)
+        # The result mesh is only used by its result object
+        if mesh is not None and not mesh.InList:
+            doc.removeObject(mesh.Name)
+
+    def add(self, iteration, result, passed, job):
+        """
+        Register the result object of a checked iteration and evict the ones
+        the policy does not keep anymore.
+        """
+        if self.policy == RETAIN_ALL:
+            return
+
+        if iteration in self._results:
+            # Solved again, on the full mesh after the coarse one, the files
+            # are the new ones
+            self._jobs.pop(iteration, None)
+            self._evict(iteration)
+            self._passed.discard(iteration)
+        self._jobs[iteration] = job
+        self._dir_owners[job.working_dir] = iteration
+        self._results[iteration] = result
+        if passed:
+            self._passed.add(iteration)
+
+        if self.policy == RETAIN_SUMMARY:
+            self._evict(iteration)
+        elif self.policy == RETAIN_LAST:
+            while len(self._results) > self.keep:
+                self._evict(next(iter(self._results)))
+        elif self.policy == RETAIN_SOLUTION:
+            # Passing results may still become the solution, the rest only
+            # has to live until the next one arrives
+            for it in list(self._results):
+                if it != iteration and it not in self._passed:
+                    self._evict(it)
+
+    def finish(self, solution):
+        """
+        @param solution iteration that was reported, None if there is none
+        """
+        if self.policy == RETAIN_SOLUTION:
+            for it in list(self._results):
+                if it != solution:
+                    self._evict(it)
+
+        for (it, job) in sorted(self._unarchived.items()):
+            # NOTE: one solved again still has its results in the document
+            if it not in self._results:
+                self._archive(it, job)
+                self.evicted[it]["files"] = self._archived[it]
+        self._unarchived = {}
+
+        if self.evicted:
+            os.makedirs(self.archive_dir, exist_ok=True)
+            file_name = os.path.join(self.archive_dir, "summaries.json")
+            with open(file_name, "w") as f:
+                json.dump({str(it): ev for (it, ev) in sorted(self.evicted.items())}, f, indent=1)
+            if self.log:
+                self.log(f"Removed {len(self.evicted)} result objects, "
+                         f"their results are in {self.archive_dir}")
@@ -0,0 +1,139 @@
+"""
+Hands out CPU cores to concurrently running ccx processes.
+
+Wide runs one job at a time on all cores, narrow splits the cores between
+ParallelJobs jobs and auto measures how ccx scales on the first runs of a
+sweep and then picks the job width which finishes the remaining runs first.
+"""
+import collections
+import math
+import os
+import threading
+
+SCHEDULE_AUTO = "Auto"
+SCHEDULE_WIDE = "Wide"
+SCHEDULE_NARROW = "Narrow"
+SCHEDULES = [SCHEDULE_AUTO, SCHEDULE_WIDE, SCHEDULE_NARROW]
+
+
+def available_cpus():
+    """
+    @returns sorted list of the cores we may run on
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def set_affinity(pid, cores):
+    # NOTE: not available on Windows and macOS, the thread count still applies
+    if hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(pid, cores)
+        except OSError:
+            pass
+
+
+class CpuScheduler():
+    """
+    @param mode one of SCHEDULES
+    @param max_jobs concurrent job limit, 0 for no limit
+    @param total_jobs number of jobs the run will have, used to plan auto mode
+    """
+    def __init__(self, mode, max_jobs=0, total_jobs=None, log=None, cpus=None):
+        self.mode = mode
+        self.cpus = cpus or available_cpus()
+        self.max_jobs = max_jobs if max_jobs > 0 else len(self.cpus)
+        self.total_jobs = total_jobs
+        self.log = log
+
+        ncpus = len(self.cpus)
+        if mode == SCHEDULE_NARROW:
+            self.threads = max(1, ncpus // self.max_jobs)
+        else:
+            # Auto starts wide, that is the first measurement
+            self.threads = ncpus
+
+        self._free = list(self.cpus)
+        # Jobs get their cores in the order they asked, lower iterations first
+        self._waiting = collections.deque()
+        self._cond = threading.Condition()
+        self._finished = 0
+        # threads -> [elapsed time], only collected while auto is measuring
+        self._samples = {}
+        self._measuring = mode == SCHEDULE_AUTO and ncpus > 1
+
+    def _log(self, msg):
+        if self.log:
+            self.log(msg)
+
+    def acquire(self, stop):
+        """
+        Wait until enough cores are free for a job.
+
+        @param stop function returning True if the job should not start anymore
+        @returns list of cores or None if stopped
+        """
+        ticket = object()
+        with self._cond:
+            self._waiting.append(ticket)
+            while not stop():
+                threads = self.threads
+                if self._waiting[0] is ticket and len(self._free) >= threads:
+                    self._waiting.popleft()
+                    cores = self._free[:threads]
+                    del self._free[:threads]
+                    self._cond.notify_all()
+                    return cores
+                self._cond.wait(0.2)
+            self._waiting.remove(ticket)
+            self._cond.notify_all()
+            return None
+
+    def release(self, cores, elapsed_time=None):
+        """
+        @param elapsed_time ccx run time, None if the job did not run to the end
+        """
+        with self._cond:
+            self._free.extend(cores)
+            self._free.sort()
+            self._finished += 1
+            if self._measuring and elapsed_time is not None:
+                self._samples.setdefault(len(cores), []).append(elapsed_time)
+                self._plan()
+            self._cond.notify_all()
+
+    def wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def _plan(self):
+        ncpus = len(self.cpus)
+        half = max(1, ncpus // 2)
+        if half not in self._samples:
+            # Second measurement at half width, two jobs side by side
+            self.threads = half
+            return
+        if ncpus not in self._samples:
+            return
+        self._measuring = False
+
+        # Fit t(k) = serial + parallel / k through the two widths
+        wide = sum(self._samples[ncpus]) / len(self._samples[ncpus])
+        narrow = sum(self._samples[half]) / len(self._samples[half])
+        parallel = max(0.0, (narrow - wide) / (1.0 / half - 1.0 / ncpus))
+        serial = max(0.0, wide - parallel / ncpus)
+
+        remaining = max(1, (self.total_jobs or ncpus) - self._finished)
+
+        def makespan(k):
+            jobs = min(self.max_jobs, ncpus // k)
+            return math.ceil(remaining / jobs) * (serial + parallel / k)
+
+        widths = sorted({2 ** n for n in range(int(math.log2(ncpus)) + 1)} | {ncpus})
+        widths = [k for k in widths if ncpus // k <= self.max_jobs] or [ncpus]
+        self.threads = min(widths, key=makespan)
+
+        speedup = (serial + parallel) / wide if wide > 0 else 1.0
+        self._log(f"ccx speedup on {ncpus} cores is {speedup:.1f}x, "
+                  f"running {ncpus // self.threads} jobs with {self.threads} threads each")
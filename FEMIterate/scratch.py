@@ -0,0 +1,141 @@
+"""
+Per-iteration working directories on a RAM disk. The decks and ccx outputs
+only live there while they are needed, the files worth keeping are copied
+to persistent storage at the end of the run.
+"""
+from collections import OrderedDict
+import os
+import re
+import shutil
+import tempfile
+
+SCRATCH_ROOTS = ["/dev/shm"]
+
+_INCLUDE_RE = re.compile(r"^\*INCLUDE\s*,\s*INPUT\s*=\s*(.+?)\s*$", re.IGNORECASE)
+
+
+def default_scratch_root():
+    """
+    @returns the first writable RAM-backed directory, or the temp directory
+    """
+    for root in SCRATCH_ROOTS:
+        if os.path.isdir(root) and os.access(root, os.W_OK):
+            return root
+    return tempfile.gettempdir()
+
+
+def _dir_size(path):
+    size = 0
+    for (root, _, files) in os.walk(path):
+        for name in files:
+            try:
+                size += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return size
+
+
+class ScratchSpace():
+    """
+    Iteration directories are deleted oldest first when the finished ones
+    take more than budget bytes. Pinned ones (passing iterations, the deck
+    includes of the patcher) and the newest finished one are kept.
+    """
+    def __init__(self, root, budget, log=None):
+        root = root or default_scratch_root()
+        self.log = log
+        self.budget = budget
+        free = shutil.disk_usage(root).free
+        if free < budget:
+            self.budget = int(free * 0.9)
+            if log:
+                log(f"Only {free // 2**20} MB free in {root}, scratch budget lowered to that")
+        self.dir = tempfile.mkdtemp(prefix="femiterate-", dir=root)
+        # iteration -> size once finished or None while in use, oldest first
+        self._dirs = OrderedDict()
+        self._pinned = set()
+        self._warned = False
+
+    def iteration_dir(self, iteration):
+        path = os.path.join(self.dir, f"iteration{iteration}")
+        self._dirs[iteration] = None
+        self._dirs.move_to_end(iteration)
+        return path
+
+    def pin(self, iteration):
+        self._pinned.add(iteration)
+
+    def done(self, iteration, keep=False):
+        """
+        The iteration was checked, its files may be deleted unless keep.
+        """
+        if iteration not in self._dirs:
+            return
+        if keep:
+            self._pinned.add(iteration)
+        self._dirs[iteration] = _dir_size(os.path.join(self.dir, f"iteration{iteration}"))
+        self._dirs.move_to_end(iteration)
+        self._enforce_budget()
+
+    def _enforce_budget(self):
+        total = sum(size for size in self._dirs.values() if size)
+        if total <= self.budget:
+            return
+        finished = [it for (it, size) in self._dirs.items() if size is not None]
+        # NOTE: the newest one may still be imported as the final result
+        for it in finished[:-1]:
+            if it in self._pinned:
+                continue
+            total -= self._dirs.pop(it)
+            shutil.rmtree(os.path.join(self.dir, f"iteration{it}"), ignore_errors=True)
+            if total <= self.budget:
+                return
+        if not self._warned and self.log:
+            self.log(f"Scratch space is {total // 2**20} MB, over its budget, "
+                     "the remaining iterations are still needed")
+            self._warned = True
+
+    def promote(self, iteration, dest_dir, extensions):
+        """
+        Copy the files of an iteration with the given extensions into
+        dest_dir. Files included by a deck are copied along and the deck
+        made to include them from there.
+
+        @returns copied file names
+        """
+        src_dir = os.path.join(self.dir, f"iteration{iteration}")
+        if not os.path.isdir(src_dir):
+            return []
+        os.makedirs(dest_dir, exist_ok=True)
+        copied = []
+        for name in sorted(os.listdir(src_dir)):
+            ext = os.path.splitext(name)[1].lstrip(".").lower()
+            if ext not in extensions:
+                continue
+            src = os.path.join(src_dir, name)
+            dst = os.path.join(dest_dir, name)
+            if ext == "inp":
+                copied += self._promote_deck(src, dst)
+            else:
+                shutil.copyfile(src, dst)
+            copied.append(dst)
+        return copied
+
+    @staticmethod
+    def _promote_deck(src, dst):
+        dest_dir = os.path.dirname(dst)
+        copied = []
+        with open(src) as f_in, open(dst, "w") as f_out:
+            for line in f_in:
+                m = _INCLUDE_RE.match(line)
+                if m:
+                    include = os.path.normpath(os.path.join(os.path.dirname(src), m.group(1)))
+                    name = os.path.basename(include)
+                    shutil.copyfile(include, os.path.join(dest_dir, name))
+                    copied.append(os.path.join(dest_dir, name))
+                    line = f"*INCLUDE,INPUT={name}\n"
+                f_out.write(line)
+        return copied
+
+    def close(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
@@ -0,0 +1,138 @@
+import ast
+
+
+def objective_from_check(expr):
+    """
+    Turn a single comparison check into a scalar objective which is <= 0 when
+    the check passes, e.g. "max(r.vonMises) < 100" -> "(max(r.vonMises)) - (100)".
+
+    @returns objective expression or None if the check is not a simple comparison
+    """
+    try:
+        tree = ast.parse(expr, mode="eval")
+    except SyntaxError:
+        return None
+
+    node = tree.body
+    if not isinstance(node, ast.Compare) or len(node.ops) != 1:
+        return None
+
+    left = ast.get_source_segment(expr, node.left)
+    right = ast.get_source_segment(expr, node.comparators[0])
+    op = node.ops[0]
+
+    if isinstance(op, (ast.Lt, ast.LtE)):
+        return f"({left}) - ({right})"
+    elif isinstance(op, (ast.Gt, ast.GtE)):
+        return f"({right}) - ({left})"
+    return None
+
+
+def relative_objective_from_check(expr):
+    """
+    Like objective_from_check() but divided by the size of both sides, so it
+    is unitless and lies in [-1, 1], e.g. "max(r.vonMises) < 100" at 80 -> -0.11.
+
+    @returns objective expression or None if the check is not a simple comparison
+    """
+    objective = objective_from_check(expr)
+    if objective is None:
+        return None
+    node = ast.parse(expr, mode="eval").body
+    left = ast.get_source_segment(expr, node.left)
+    right = ast.get_source_segment(expr, node.comparators[0])
+    return f"({objective}) / (abs({left}) + abs({right}))"
+
+
+class BracketSearch():
+    """
+    Finds the smallest step multiplier for which the objective drops to <= 0.
+
+    Both ends of [start, end] are evaluated first to bracket the root, which
+    is then narrowed down with Brent's method (inverse quadratic / secant
+    steps with a bisection fallback). The search is driven from the outside
+    so every point costs exactly one solve:
+
+        while not s.done:
+            t = s.next_point()
+            s.add_result(t, objective(t))
+    """
+    def __init__(self, start, end, tolerance):
+        self.start = float(start)
+        self.end = float(end)
+        self.tolerance = tolerance
+
+        self.done = False
+        self.result = None
+
+        self._point = None
+        self._steps = self._brent()
+        self._point = next(self._steps)
+
+    def next_point(self):
+        return self._point
+
+    def add_result(self, t, value):
+        try:
+            self._point = self._steps.send(value)
+        except StopIteration:
+            self.done = True
+
+    def _brent(self):
+        # Follows the usual zbrent formulation, only the sign tests are
+        # pass/fail (<= 0 / > 0) tests instead of strict signs.
+        a, b = self.start, self.end
+        fa = yield a
+        if fa <= 0:
+            # Already passing at the start
+            self.result = a
+            return
+        fb = yield b
+        if fb > 0:
+            # Nothing passes even at the far end, no root in range
+            return
+
+        c, fc = a, fa
+        d = e = b - a
+        tol1 = 0.5 * self.tolerance
+
+        while True:
+            if (fb > 0) == (fc > 0):
+                c, fc = a, fa
+                d = e = b - a
+            if abs(fc) < abs(fb):
+                a, fa = b, fb
+                b, fb = c, fc
+                c, fc = a, fa
+
+            xm = 0.5 * (c - b)
+            if abs(xm) <= tol1 or fb == 0:
+                self.result = b if fb <= 0 else c
+                return
+
+            if abs(e) >= tol1 and abs(fa) > abs(fb):
+                s = fb / fa
+                if a == c:
+                    p = 2.0 * xm * s
+                    q = 1.0 - s
+                else:
+                    q = fa / fc
+                    r = fb / fc
+                    p = s * (2.0 * xm * q * (q - r) - (b - a) * (r - 1.0))
+                    q = (q - 1.0) * (r - 1.0) * (s - 1.0)
+                if p > 0:
+                    q = -q
+                p = abs(p)
+                if 2.0 * p < min(3.0 * xm * q - abs(tol1 * q), abs(e * q)):
+                    e = d
+                    d = p / q
+                else:
+                    d = xm
+                    e = d
+            else:
+                d = xm
+                e = d
+
+            a, fa = b, fb
+            b += d if abs(d) > tol1 else (tol1 if xm > 0 else -tol1)
+            fb = yield b
@@ -0,0 +1,257 @@
+from .doe import DESIGNS, DESIGN_FACTORIAL, ORDERS, ORDER_GENERATED, PRUNINGS, PRUNE_OFF
+from .retention import RETENTIONS, RETAIN_LAST
+from .scheduler import SCHEDULES, SCHEDULE_AUTO
+from .surrogate import SURROGATES, SURROGATE_OFF
+from .watchdog import TIMEOUT_CONTINUE, TIMEOUT_POLICIES
+import FreeCAD
+import json
+import os
+import tempfile
+
+FEMITERATE_VERSION = "0.0.1"
+
+TYPEID_FEM_MESH = "Fem::FemMeshObjectPython"
+TYPEID_FEM_ANALYSIS = "Fem::FemAnalysis"
+TYPEID_FEM_SOLVER = "Fem::FemSolverObjectPython"
+TYPEID_SETTINGS = "App::FeaturePython"
+SETTINGS_LABEL = "FEMIterateSettings"
+
+BUILTIN_QUICK_EXPRESSIONS = [
+    "max(r.vonMises) < 100",
+    "max(r.Temperature) < 300"
+]
+
+MODE_SEQUENTIAL = "Sequential"
+MODE_SWEEP = "Sweep"
+MODE_SEARCH = "Search"
+MODE_DOE = "DOE"
+MODES = [MODE_SEQUENTIAL, MODE_SWEEP, MODE_SEARCH, MODE_DOE]
+
+# Options which were added after the first version. These are plain values,
+# so they are added to older settings objects on load with their defaults.
+# (property type, property name, attribute name, tooltip)
+SETTINGS_OPTIONS = [
+    ("App::PropertyString", "Mode", "mode",
+        f"Iteration mode, one of: {', '.join(MODES)}"),
+    ("App::PropertyInteger", "ParallelJobs", "parallel_jobs",
+        "Concurrent ccx runs in sweep mode, 0 uses all CPU cores"),
+    ("App::PropertyString", "Scheduler", "scheduler",
+        f"How sweep mode splits the CPU cores between ccx runs, one of: {', '.join(SCHEDULES)}"),
+    ("App::PropertyString", "Objective", "objective",
+        "Search mode objective, passes when <= 0. Empty derives it from the first check"),
+    ("App::PropertyFloat", "SearchTolerance", "search_tolerance",
+        "Search mode stops when the pass/fail boundary is known within this many steps"),
+    ("App::PropertyString", "DoeDesign", "doe_design",
+        f"DOE mode design, one of: {', '.join(DESIGNS)}"),
+    ("App::PropertyInteger", "DoeLevels", "doe_levels",
+        "DOE mode levels per property, level n applies the change n times"),
+    ("App::PropertyString", "DoeOrder", "doe_order",
+        f"Order DOE points are solved in, one of: {', '.join(ORDERS)}"),
+    ("App::PropertyString", "DoePruning", "doe_pruning",
+        f"Skip DOE points a failed point shows can't pass, one of: {', '.join(PRUNINGS)}"),
+    ("App::PropertyString", "Surrogate", "surrogate",
+        f"Model the check margins in DOE mode and only solve the points that can do better, one of: {', '.join(SURROGATES)}"),
+    ("App::PropertyFloat", "CoarseMesh", "coarse_mesh",
+        "Sequential mode explores on a mesh with the element sizes scaled by this, 1 always uses the full mesh"),
+    ("App::PropertyFloat", "CoarseMargin", "coarse_margin",
+        "Switch to the full mesh once a check is within this relative distance of its limit"),
+    ("App::PropertyBool", "Scratch", "scratch",
+        "Put the working directory of every iteration on a RAM disk, only KeepFiles of the reported one are kept"),
+    ("App::PropertyPath", "ScratchDir", "scratch_dir",
+        "Directory for the scratch working directories, empty uses /dev/shm if there is one"),
+    ("App::PropertyInteger", "ScratchSize", "scratch_size",
+        "Size limit of the scratch working directories in MB, older iterations are removed first"),
+    ("App::PropertyString", "KeepFiles", "keep_files",
+        "Extensions of the files of the reported iteration copied to the ccx working directory, e.g. inp frd dat sta"),
+    ("App::PropertyFloat", "CcxTimeout", "ccx_timeout",
+        "Seconds a single ccx run may take before it is killed and its iteration failed, 0 for no limit"),
+    ("App::PropertyInteger", "MaxCutbacks", "max_cutbacks",
+        "Kill a ccx run once an increment was cut back this many times and fail its iteration, 0 lets ccx decide"),
+    ("App::PropertyFloat", "CheckTimeout", "check_timeout",
+        "Seconds the checks of an iteration may take before the iteration is failed, 0 for no limit"),
+    ("App::PropertyFloat", "RunTimeout", "run_timeout",
+        "Seconds the whole run may take, it stops when they are up and can be resumed. 0 for no limit"),
+    ("App::PropertyString", "TimeoutPolicy", "timeout_policy",
+        f"What to do after an iteration ran out of time or did not converge, one of: {', '.join(TIMEOUT_POLICIES)}"),
+    ("App::PropertyInteger", "MeshCacheSize", "mesh_cache_size",
+        "Meshes kept for reuse when the geometry does not change, 0 always remeshes"),
+    ("App::PropertyPath", "ResultCacheDir", "result_cache_dir",
+        "Directory of the solved variant cache, empty uses the FreeCAD user data directory"),
+    ("App::PropertyInteger", "ResultCacheSize", "result_cache_size",
+        "Size limit of the solved variant cache in MB, 0 disables the cache"),
+    ("App::PropertyString", "KeepResults", "keep_results",
+        f"Which result objects stay in the document, one of: {', '.join(RETENTIONS)}. "
+        "Removed ones keep a summary and their result files"),
+    ("App::PropertyInteger", "KeepResultsCount", "keep_results_count",
+        "Result objects kept with KeepResults set to Last"),
+    ("App::PropertyBool", "FastResults", "fast_results",
+        "Read only the fields the checks use from the .frd, import full results for the final iteration only"),
+    ("App::PropertyBool", "Resume", "resume",
+        "Continue an unfinished run of the same study from its checkpoint instead of starting over"),
+    ("App::PropertyBool", "WarmStart", "warm_start",
+        "Start the iterations from the values of the last passing run instead of the original values"),
+    ("App::PropertyBool", "LogFile", "log_file",
+        "Mirror the log to a rotating <document>_femiterate.log file"),
+    ("App::PropertyBool", "Profile", "profile",
+        "Run cProfile over every run and dump a .prof file next to the document"),
+    ("App::PropertyBool", "ScopedRecompute", "scoped_recompute",
+        "Recompute only the changed objects and what depends on them instead of the whole document"),
+    ("App::PropertyBool", "PatchDeck", "patch_deck",
+        "Only rewrite the changed load and boundary condition cards of the .inp deck when nothing else changes"),
+    ("App::PropertyPath", "SpoolDir", "spool_dir",
+        "Shared directory to hand the ccx runs to spool workers through, empty runs ccx locally"),
+    ("App::PropertyInteger", "SpoolLocalWorkers", "spool_local_workers",
+        "Spool workers to start inside FreeCAD, 0 relies on external workers only"),
+]
+
+
+def find_object_by_typeid(type, match_label=None):
+    for obj in FreeCAD.ActiveDocument.Objects:
+        if obj.TypeId == type:
+            if match_label is None or obj.Label == match_label:
+                return obj
+    return None
+
+
+class Settings():
+    def __init__(self):
+        self.changes = {}
+        self.checks = []
+        self.iteration_limit = 20
+        self.csv_suffix = "femiterate.csv"
+        self.quick_expressions = BUILTIN_QUICK_EXPRESSIONS
+        self.mode = MODE_SEQUENTIAL
+        self.parallel_jobs = 0
+        self.scheduler = SCHEDULE_AUTO
+        self.objective = ""
+        self.search_tolerance = 0.1
+        self.doe_design = DESIGN_FACTORIAL
+        self.doe_levels = 3
+        self.doe_order = ORDER_GENERATED
+        self.doe_pruning = PRUNE_OFF
+        self.surrogate = SURROGATE_OFF
+        self.coarse_mesh = 1.0
+        self.coarse_margin = 0.1
+        self.scratch = False
+        self.scratch_dir = ""
+        self.scratch_size = 2048
+        self.keep_files = "inp frd dat"
+        self.ccx_timeout = 0.0
+        self.max_cutbacks = 0
+        self.check_timeout = 0.0
+        self.run_timeout = 0.0
+        self.timeout_policy = TIMEOUT_CONTINUE
+        self.mesh_cache_size = 4
+        self.result_cache_dir = ""
+        self.result_cache_size = 1024
+        self.keep_results = RETAIN_LAST
+        self.keep_results_count = 5
+        self.fast_results = True
+        self.resume = True
+        self.warm_start = False
+        self.log_file = True
+        self.profile = False
+        self.patch_deck = True
+        self.scoped_recompute = True
+        self.spool_dir = ""
+        self.spool_local_workers = 0
+        self._obj = None
+
+        self._obj = find_object_by_typeid(TYPEID_SETTINGS, SETTINGS_LABEL)
+        if not self._obj:
+            self._obj = self.create_new()
+        else:
+            self.load()
+
+    def create_new(self):
+        obj = FreeCAD.ActiveDocument.addObject(TYPEID_SETTINGS, SETTINGS_LABEL)
+        # General configuration
+        obj.addProperty("App::PropertyInteger", "IterationLimit", "Configuration", "")
+        obj.addProperty("App::PropertyString", "CsvSuffix", "Configuration", "")
+        obj.addProperty("App::PropertyString", "FEMIterateVersion", "Configuration", "")
+        # Quick expressions
+        obj.addProperty("App::PropertyString", "QuickExpressions", "Configuration", "")
+        # Parameters
+        obj.addProperty("App::PropertyString", "Changes", "Parameters", "")
+        obj.addProperty("App::PropertyString", "Checks", "Parameters", "")
+
+        self._add_missing_options(obj)
+
+        self._obj = obj
+        self.save()
+        return obj
+
+    def _add_missing_options(self, obj):
+        for (typ, name, attr, tooltip) in SETTINGS_OPTIONS:
+            if name not in obj.PropertiesList:
+                obj.addProperty(typ, name, "Configuration", tooltip)
+                setattr(obj, name, getattr(self, attr))
+
+    def load(self):
+        # Documents saved with an older version may be missing some options
+        self._add_missing_options(self._obj)
+
+        self.iteration_limit = self._obj.IterationLimit
+        self.csv_suffix = self._obj.CsvSuffix
+
+        # No need to load FEMIterateVersion
+        self.quick_expressions = json.loads(self._obj.QuickExpressions)
+
+        # TODO: check if we still actually have these objects and
+        # fill the "orig" field with latest data.
+        self.changes = json.loads(self._obj.Changes)
+        self.checks = json.loads(self._obj.Checks)
+
+        for (_, name, attr, _) in SETTINGS_OPTIONS:
+            setattr(self, attr, getattr(self._obj, name))
+
+    @staticmethod
+    def output_file_name(suffix):
+        """
+        @returns file name next to the document, named <document>_<suffix>
+        """
+        doc = FreeCAD.ActiveDocument
+        if doc.FileName:
+            base = os.path.splitext(doc.FileName)[0]
+        else:
+            # Document was never saved, no directory to put it in
+            base = os.path.join(tempfile.gettempdir(), doc.Name)
+        return f"{base}_{suffix}"
+
+    def csv_file_name(self):
+        """
+        @returns per-iteration results file or None if disabled
+        """
+        if not self.csv_suffix:
+            return None
+        return self.output_file_name(self.csv_suffix)
+
+    def log_file_name(self):
+        """
+        @returns log mirror file or None if disabled
+        """
+        if not self.log_file:
+            return None
+        return self.output_file_name("femiterate.log")
+
+    def save(self, edited=None):
+        """
+        @param edited attribute names of the SETTINGS_OPTIONS the caller
+               changes, the others are reloaded from the document rather
+               than written so property editor changes are kept. None
+               writes all of them.
+        """
+        self._obj.IterationLimit = self.iteration_limit
+        self._obj.CsvSuffix = self.csv_suffix
+
+        self._obj.FEMIterateVersion = FEMITERATE_VERSION
+        self._obj.QuickExpressions = json.dumps(self.quick_expressions)
+
+        self._obj.Changes = json.dumps(self.changes)
+        self._obj.Checks = json.dumps(self.checks)
+
+        for (_, name, attr, _) in SETTINGS_OPTIONS:
+            if edited is None or attr in edited:
+                setattr(self._obj, name, getattr(self, attr))
+            else:
+                setattr(self, attr, getattr(self._obj, name))
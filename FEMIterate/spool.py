@@ -0,0 +1,353 @@
+"""
+Distributed solving through a shared spool directory.
+
+The coordinator (SpoolPool, used by the engine like a CcxPool) writes every
+job as a self-contained bundle, the .inp deck plus a job.json, and workers
+on any machine that sees the directory pull them:
+
+    <spool>/tmp/<id>       bundle being written
+    <spool>/new/<id>       waiting for a worker
+    <spool>/running/<id>   claimed by a worker, renamed from new/ atomically
+    <spool>/done/<id>      finished, has result.json and fields.npz
+    <spool>/cancel/<id>    marker asking the worker to kill the job
+
+Workers don't need FreeCAD, only ccx and NumPy:
+
+    python3 -m FEMIterate.spool <spool> [--ccx ccx] [--threads N]
+"""
+from concurrent.futures import Future
+from .ccxpool import ccx_env
+from .frdreader import FrdError, read_frd
+from .watchdog import ConvergenceMonitor
+import argparse
+import json
+import numpy as np
+import os
+import shutil
+import socket
+import subprocess
+import threading
+import time
+import uuid
+
+SPOOL_DIRS = ["tmp", "new", "running", "done", "cancel"]
+
+# Seconds between directory polls
+POLL_INTERVAL = 0.5
+# A running job whose heartbeat is older than this is given to another worker
+HEARTBEAT_TIMEOUT = 60.0
+# Bytes of the ccx stderr sent back
+STDERR_TAIL = 4000
+
+
+def _make_dirs(spool_dir):
+    for d in SPOOL_DIRS:
+        os.makedirs(os.path.join(spool_dir, d), exist_ok=True)
+
+
+class SpoolWorker():
+    """
+    Pulls jobs from the spool, runs ccx on them and writes back a compact
+    result: the return code and the requested fields as a .npz file. The
+    time budget and cutback limit of a job come with it in job.json.
+    """
+    def __init__(self, spool_dir, ccx_binary="ccx", threads=None, name=None):
+        self.spool_dir = spool_dir
+        self.ccx_binary = ccx_binary
+        self.threads = threads
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+        _make_dirs(spool_dir)
+
+    def _path(self, *parts):
+        return os.path.join(self.spool_dir, *parts)
+
+    def _claim(self):
+        """
+        @returns id of a claimed job or None
+        """
+        for job_id in sorted(os.listdir(self._path("new"))):
+            try:
+                # NOTE: rename is atomic, only one worker wins the job
+                os.rename(self._path("new", job_id), self._path("running", job_id))
+                return job_id
+            except OSError:
+                continue
+        return None
+
+    def _run_job(self, job_id):
+        job_dir = self._path("running", job_id)
+        with open(os.path.join(job_dir, "job.json")) as f:
+            meta = json.load(f)
+        with open(os.path.join(job_dir, "worker"), "w") as f:
+            f.write(self.name)
+
+        if os.path.exists(self._path("cancel", job_id)):
+            self._finish_job(job_id, {"returncode": -1, "stderr": "", "elapsed_time": 0.0,
+                                      "worker": self.name, "killed": True})
+            return
+
+        env = ccx_env(meta.get("threads") or self.threads)
+
+        timeout = meta.get("timeout")
+        monitor = None
+        if meta.get("max_cutbacks"):
+            monitor = ConvergenceMonitor(job_dir, meta["job_name"], meta["max_cutbacks"])
+
+        start = time.perf_counter()
+        heartbeat = os.path.join(job_dir, "heartbeat")
+        stderr_file_name = os.path.join(job_dir, "ccx.stderr")
+        killed = False
+        aborted = None
+        # NOTE: a file, nobody reads a pipe while polling and ccx would block on a full one
+        with open(stderr_file_name, "wb") as stderr_file:
+            proc = subprocess.Popen([self.ccx_binary, "-i", meta["job_name"]], cwd=job_dir,
+                                    stdout=subprocess.DEVNULL, stderr=stderr_file, env=env)
+            while proc.poll() is None:
+                with open(heartbeat, "w") as f:
+                    f.write(str(time.time()))
+                if os.path.exists(self._path("cancel", job_id)):
+                    proc.kill()
+                    killed = True
+                elif aborted is None:
+                    if timeout and time.perf_counter() - start > timeout:
+                        aborted = f"ccx took longer than {timeout:g} s"
+                    elif monitor is not None:
+                        aborted = monitor.poll()
+                    if aborted is not None:
+                        proc.kill()
+                time.sleep(POLL_INTERVAL)
+        with open(stderr_file_name, "rb") as f:
+            f.seek(max(0, os.fstat(f.fileno()).st_size - STDERR_TAIL))
+            stderr = f.read().decode(errors="replace")
+
+        result = {
+            "returncode": proc.returncode,
+            "stderr": stderr,
+            "elapsed_time": time.perf_counter() - start,
+            "worker": self.name,
+            "killed": killed,
+            "aborted": aborted,
+        }
+
+        fields = meta.get("fields")
+        if fields and proc.returncode == 0 and not killed:
+            try:
+                frd = read_frd(os.path.join(job_dir, meta["job_name"] + ".frd"), fields)
+                np.savez_compressed(os.path.join(job_dir, "fields.npz"),
+                                    NodeNumbers=frd.NodeNumbers,
+                                    **{f: getattr(frd, f) for f in fields})
+            except FrdError as e:
+                result["fields_error"] = str(e)
+
+        self._finish_job(job_id, result)
+
+    def _finish_job(self, job_id, result):
+        job_dir = self._path("running", job_id)
+        with open(os.path.join(job_dir, "result.json"), "w") as f:
+            json.dump(result, f)
+        os.rename(job_dir, self._path("done", job_id))
+
+    def run(self, stop_event=None, once=False):
+        while stop_event is None or not stop_event.is_set():
+            job_id = self._claim()
+            if job_id is None:
+                if once:
+                    return
+                time.sleep(POLL_INTERVAL)
+                continue
+            self._run_job(job_id)
+
+
+class SpoolPool():
+    """
+    Drop-in for CcxPool which hands the jobs to spool workers. With
+    local_workers > 0 that many in-process worker threads are started, which
+    is enough to use the protocol on a single machine.
+    """
+    def __init__(self, spool_dir, ccx_binary, fields=None, threads_per_job=None, local_workers=0,
+                 timeout=None, max_cutbacks=0):
+        self.spool_dir = spool_dir
+        self.ccx_binary = ccx_binary
+        self.fields = fields
+        self.threads_per_job = threads_per_job
+        self.timeout = timeout
+        self.max_cutbacks = max_cutbacks
+        # NOTE: results are not cached in spool mode, the .frd stays in the spool
+        self.cache = None
+        _make_dirs(spool_dir)
+
+        self._pending = {}
+        self._finished = []
+        # job id -> when it was first seen running without heartbeat or claim file
+        self._claimed = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        self._workers = []
+        for n in range(local_workers):
+            worker = SpoolWorker(spool_dir, ccx_binary, threads_per_job,
+                                 name=f"local-{os.getpid()}-{n}")
+            t = threading.Thread(target=worker.run, args=(self._stop,), daemon=True)
+            t.start()
+            self._workers.append(t)
+
+        self._watcher = threading.Thread(target=self._watch, daemon=True)
+        self._watcher.start()
+
+    def _path(self, *parts):
+        return os.path.join(self.spool_dir, *parts)
+
+    def submit(self, job):
+        job.spool_id = f"{time.strftime('%Y%m%d%H%M%S')}-{job.iteration:05d}-{uuid.uuid4().hex[:8]}"
+        bundle = self._path("tmp", job.spool_id)
+        os.makedirs(bundle)
+        shutil.copyfile(job.inp_file_name, os.path.join(bundle, job.job_name + ".inp"))
+        with open(os.path.join(bundle, "job.json"), "w") as f:
+            json.dump({
+                "job_name": job.job_name,
+                "iteration": job.iteration,
+                "fields": self.fields,
+                "threads": self.threads_per_job,
+                "values": job.values,
+                "timeout": self.timeout,
+                "max_cutbacks": self.max_cutbacks,
+            }, f)
+
+        future = Future()
+        future.set_running_or_notify_cancel()
+        with self._lock:
+            self._pending[job.spool_id] = (job, future)
+        os.rename(bundle, self._path("new", job.spool_id))
+        return future
+
+    def _finish(self, job_id):
+        with self._lock:
+            (job, future) = self._pending.pop(job_id)
+            self._finished.append(job_id)
+        self._claimed.pop(job_id, None)
+
+        done_dir = self._path("done", job_id)
+        with open(os.path.join(done_dir, "result.json")) as f:
+            result = json.load(f)
+
+        job.returncode = result["returncode"]
+        job.stderr = result["stderr"]
+        job.elapsed_time = result["elapsed_time"]
+        job.killed = job.killed or result["killed"]
+        job.aborted = result.get("aborted")
+        job.remote_dir = done_dir
+        fields_file = os.path.join(done_dir, "fields.npz")
+        if os.path.isfile(fields_file):
+            job.fields_file = fields_file
+        job.fields_error = result.get("fields_error")
+        future.set_result(job)
+
+    def _drop(self, job_id):
+        with self._lock:
+            (job, future) = self._pending.pop(job_id)
+        job.returncode = -1
+        future.set_result(job)
+
+    def _requeue_stale(self, job_id):
+        """
+        Give the job of a worker that went away to another worker. Its last
+        sign of life is the heartbeat, or the claim if it died before the
+        first heartbeat.
+        """
+        running = self._path("running", job_id)
+        seen = []
+        for name in ("heartbeat", "worker"):
+            try:
+                seen.append(os.path.getmtime(os.path.join(running, name)))
+            except OSError:
+                pass
+        # NOTE: without either the job was claimed a moment ago, count from now
+        last = max(seen) if seen else self._claimed.setdefault(job_id, time.time())
+        if time.time() - last <= HEARTBEAT_TIMEOUT:
+            return
+        self._claimed.pop(job_id, None)
+        try:
+            for name in ("heartbeat", "worker"):
+                if os.path.exists(os.path.join(running, name)):
+                    os.remove(os.path.join(running, name))
+            with self._lock:
+                killed = self._pending[job_id][0].killed
+            if killed:
+                shutil.rmtree(self._path("running", job_id), ignore_errors=True)
+                self._drop(job_id)
+            else:
+                os.rename(self._path("running", job_id), self._path("new", job_id))
+        except OSError:
+            pass
+
+    def _watch(self):
+        while not self._stop.is_set():
+            with self._lock:
+                ids = list(self._pending)
+            for job_id in ids:
+                if os.path.isdir(self._path("done", job_id)):
+                    self._finish(job_id)
+                elif os.path.isdir(self._path("running", job_id)):
+                    self._requeue_stale(job_id)
+            time.sleep(POLL_INTERVAL)
+
+    def kill(self, job):
+        job.killed = True
+        job_id = getattr(job, "spool_id", None)
+        if job_id is None:
+            return
+        # Unqueue it if no worker took it yet, otherwise ask the worker
+        try:
+            os.rename(self._path("new", job_id), self._path("tmp", job_id))
+        except OSError:
+            open(self._path("cancel", job_id), "w").close()
+            return
+        shutil.rmtree(self._path("tmp", job_id), ignore_errors=True)
+        self._drop(job_id)
+
+    def kill_all(self):
+        with self._lock:
+            jobs = [job for (job, _) in self._pending.values()]
+        for job in jobs:
+            self.kill(job)
+
+    def shutdown(self):
+        # Wait for the cancelled jobs to come back so nothing is left running
+        while True:
+            with self._lock:
+                if not self._pending:
+                    break
+            time.sleep(POLL_INTERVAL)
+        self._stop.set()
+        for t in self._workers:
+            t.join()
+        self._watcher.join()
+
+        # The results were either read already or copied into the working dirs
+        for job_id in self._finished:
+            shutil.rmtree(self._path("done", job_id), ignore_errors=True)
+            try:
+                os.remove(self._path("cancel", job_id))
+            except OSError:
+                pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python3 -m FEMIterate.spool",
+                                     description="FEMIterate spool worker")
+    parser.add_argument("spool_dir")
+    parser.add_argument("--ccx", default="ccx", help="ccx binary")
+    parser.add_argument("--threads", type=int, help="OMP_NUM_THREADS for every ccx run")
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    args = parser.parse_args(argv)
+
+    worker = SpoolWorker(args.spool_dir, args.ccx, args.threads)
+    print(f"Worker {worker.name} polling {args.spool_dir}", flush=True)
+    try:
+        worker.run(once=args.once)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Response surface over the design points and the check margins, used to
+pick which DOE points are worth solving.
+"""
+import numpy as np
+
+SURROGATE_OFF = "Off"
+SURROGATE_QUADRATIC = "Quadratic"
+SURROGATE_RBF = "RBF"
+SURROGATES = [SURROGATE_OFF, SURROGATE_QUADRATIC, SURROGATE_RBF]
+
+
+def _poly_features(x, quadratic):
+    """
+    @param x (n, d) points
+    @returns (n, terms) 1, x_i and with quadratic also x_i * x_j for i <= j
+    """
+    cols = [np.ones(len(x))] + [x[:, i] for i in range(x.shape[1])]
+    if quadratic:
+        for i in range(x.shape[1]):
+            for j in range(i, x.shape[1]):
+                cols.append(x[:, i] * x[:, j])
+    return np.column_stack(cols)
+
+
+class Surrogate():
+    """
+    Models every output (check margin) as a function of the design point.
+
+    Quadratic is a least squares polynomial, linear until there are enough
+    samples for all the quadratic terms. RBF interpolates the samples with a
+    cubic kernel plus a linear tail.
+    """
+    def __init__(self, model, outputs):
+        self.model = model
+        self.outputs = outputs
+        self._x = []
+        self._y = []
+        self._fit = None
+        # Squared prediction errors of the solved points, per output
+        self._errors = []
+
+    def add(self, point, values, predicted=None):
+        """
+        @returns prediction errors (values - predicted) or None
+        """
+        self._x.append(np.asarray(point, dtype=float))
+        self._y.append(np.asarray(values, dtype=float))
+        self._fit = None
+        if predicted is None:
+            return None
+        errors = self._y[-1] - np.asarray(predicted)
+        self._errors.append(errors ** 2)
+        return errors
+
+    @property
+    def rms_error(self):
+        """
+        @returns per output RMS of the prediction errors so far, inf if none
+        """
+        if not self._errors:
+            return np.full(self.outputs, np.inf)
+        return np.sqrt(np.mean(self._errors, axis=0))
+
+    def _train(self):
+        x = np.array(self._x)
+        y = np.array(self._y)
+        (n, d) = x.shape
+        if n < d + 1:
+            return None
+
+        if self.model == SURROGATE_RBF:
+            r = np.linalg.norm(x[:, None, :] - x[None, :, :], axis=2)
+            p = _poly_features(x, False)
+            a = np.block([[r ** 3, p], [p.T, np.zeros((d + 1, d + 1))]])
+            b = np.vstack([y, np.zeros((d + 1, y.shape[1]))])
+            coef = np.linalg.lstsq(a, b, rcond=None)[0]
+            return (x, coef[:n], coef[n:])
+
+        quadratic = n >= (d + 1) * (d + 2) // 2
+        coef = np.linalg.lstsq(_poly_features(x, quadratic), y, rcond=None)[0]
+        return (quadratic, coef)
+
+    def predict(self, points):
+        """
+        @param points (m, d) design points
+        @returns (m, outputs) predicted values or None if there are too few samples
+        """
+        if self._fit is None:
+            self._fit = self._train()
+            if self._fit is None:
+                return None
+
+        points = np.asarray(points, dtype=float)
+        if self.model == SURROGATE_RBF:
+            (x, weights, tail) = self._fit
+            r = np.linalg.norm(points[:, None, :] - x[None, :, :], axis=2)
+            return r ** 3 @ weights + _poly_features(points, False) @ tail
+
+        (quadratic, coef) = self._fit
+        return _poly_features(points, quadratic) @ coef
@@ -0,0 +1,80 @@
+from contextlib import contextmanager
+import threading
+import time
+
+PHASES = ["apply", "recompute", "mesh", "inp_write", "ccx", "load", "check"]
+
+
+class PhaseTimer():
+    """
+    Wall clock time per phase, kept separately for every iteration since
+    iterations can overlap in sweep mode. Finished iterations are folded
+    into min/mean/max statistics per phase.
+    """
+    def __init__(self):
+        self._timings = {}
+        # phase -> [count, total, min, max]
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def add(self, iteration, phase, seconds):
+        with self._lock:
+            timings = self._timings.setdefault(iteration, {})
+            timings[phase] = timings.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, iteration, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(iteration, phase, time.perf_counter() - start)
+
+    def pop(self, iteration):
+        """
+        Finish the iteration and add its timings to the statistics.
+
+        @returns {phase: seconds} of the iteration
+        """
+        with self._lock:
+            timings = self._timings.pop(iteration, {})
+            for (phase, seconds) in timings.items():
+                stats = self._stats.get(phase)
+                if stats is None:
+                    self._stats[phase] = [1, seconds, seconds, seconds]
+                else:
+                    stats[0] += 1
+                    stats[1] += seconds
+                    stats[2] = min(stats[2], seconds)
+                    stats[3] = max(stats[3], seconds)
+            return timings
+
+    def pop_all(self):
+        """
+        Finish all iterations that are still open.
+        """
+        with self._lock:
+            iterations = list(self._timings)
+        for iteration in iterations:
+            self.pop(iteration)
+
+    def stats(self):
+        """
+        @returns {phase: (count, min, mean, max)} over the finished iterations
+        """
+        with self._lock:
+            return {phase: (count, lo, total / count, hi)
+                    for (phase, (count, total, lo, hi)) in self._stats.items()}
+
+    def summary(self):
+        """
+        @returns list of human readable lines, one per phase
+        """
+        stats = self.stats()
+        lines = []
+        for phase in PHASES:
+            if phase in stats:
+                (count, lo, mean, hi) = stats[phase]
+                lines.append(f"{phase}: min {lo:.2f} s, mean {mean:.2f} s, "
+                             f"max {hi:.2f} s, total {mean * count:.1f} s ({count}x)")
+        return lines
@@ -0,0 +1,104 @@
+"""
+Time budgets and convergence monitoring of the iterations. A ccx run that
+takes too long or keeps cutting back its increments is killed, check
+expressions that take too long are abandoned, the iteration counts as failed.
+"""
+import os
+import threading
+
+TIMEOUT_CONTINUE = "Continue"
+TIMEOUT_STOP = "Stop"
+TIMEOUT_POLICIES = [TIMEOUT_CONTINUE, TIMEOUT_STOP]
+
+# Seconds between looks at a running ccx process
+WATCH_INTERVAL = 0.5
+
+
+class ConvergenceMonitor():
+    """
+    Follows the .cvg and .sta files ccx writes while it runs. Their rows
+    start with STEP INC ATT, every attempt at an increment after the first
+    is a cutback. The .cvg has a row per equilibrium iteration, so a
+    struggling increment shows up there long before ccx gives up on it.
+    """
+    def __init__(self, working_dir, job_name, max_cutbacks):
+        """
+        Create before ccx starts, leftovers of the previous run in the same
+        working directory are removed so they are not read as this run's.
+        """
+        self.max_cutbacks = max_cutbacks
+        self.files = [os.path.join(working_dir, f"{job_name}.{ext}") for ext in ("cvg", "sta")]
+        self._offsets = {}
+        self._partial = {}
+        for file_name in self.files:
+            self._offsets[file_name] = 0
+            self._partial[file_name] = ""
+            try:
+                os.remove(file_name)
+            except OSError:
+                pass
+
+    def _new_lines(self, file_name):
+        try:
+            with open(file_name, "rb") as f:
+                if os.fstat(f.fileno()).st_size < self._offsets[file_name]:
+                    # Rewritten, e.g. by a ccx restart
+                    self._offsets[file_name] = 0
+                    self._partial[file_name] = ""
+                f.seek(self._offsets[file_name])
+                data = f.read()
+        except OSError:
+            return []
+        self._offsets[file_name] += len(data)
+        lines = (self._partial[file_name] + data.decode(errors="replace")).split("\n")
+        # The last line may still be written to
+        self._partial[file_name] = lines.pop()
+        return lines
+
+    def poll(self):
+        """
+        @returns why the run should be aborted, or None
+        """
+        for file_name in self.files:
+            for line in self._new_lines(file_name):
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                try:
+                    (step, inc, att) = (int(f) for f in fields[:3])
+                except ValueError:
+                    # Headers
+                    continue
+                if att - 1 >= self.max_cutbacks:
+                    return f"increment {inc} of step {step} was cut back {att - 1} times"
+        return None
+
+
+def call_with_timeout(fn, timeout):
+    """
+    Call fn on a daemon thread and wait at most timeout seconds for it.
+    Python can't stop a thread, one that overruns is left to finish on its
+    own and its return value is dropped.
+
+    @returns what fn returned
+    @raises TimeoutError if it did not return in time
+    """
+    if not timeout:
+        return fn()
+
+    outcome = {}
+
+    def run():
+        try:
+            outcome["value"] = fn()
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run, name="FEMIterate expression", daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise TimeoutError(f"took longer than {timeout:g} s")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["value"]
@@ -0,0 +1,33 @@
+"""
+Run a FEMIterate study without the GUI, e.g. on a compute node:
+
+    freecadcmd FEMIterateCmd.py --pass model.FCStd [--save out.FCStd] [--iterations N]
+
+The study (changes, checks, options) is read from the FEMIterateSettings
+object of the document, so set it up in the GUI first. Exits with 0 when a
+solution was found, 1 when the iteration limit was hit and 2 on errors.
+"""
+import FreeCAD
+import os
+import sys
+
+# FreeCADCmd does not necessarily run us from the macro directory
+try:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+except NameError:
+    sys.path.insert(0, FreeCAD.getUserMacroDir())
+
+from FEMIterate.batch import main
+
+
+def _script_args():
+    # Arguments for the script come after --pass, everything before it
+    # belongs to FreeCADCmd itself
+    if "--pass" in sys.argv:
+        return sys.argv[sys.argv.index("--pass") + 1:]
+    # Fall back to the environment, handy for job schedulers
+    doc = os.environ.get("FEMITERATE_DOCUMENT")
+    return [doc] if doc else []
+
+
+sys.exit(main(_script_args()))
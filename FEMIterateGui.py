@@ -1,19 +1,16 @@
+from FEMIterate.changeplan import USERTYPE_NUMBER, USERTYPE_PYTHON, USERTYPE_UNIT
+from FEMIterate.checks import CHANGE_NAMES, CHECK_NAMES, CheckError, validate_expr
+from FEMIterate.engine import IterationEngine
+from FEMIterate.logsink import LOG_FLUSH_INTERVAL, LogSink
+from FEMIterate.propindex import NameIndex
+from FEMIterate.settings import (MODES, TYPEID_FEM_ANALYSIS, TYPEID_FEM_MESH, TYPEID_FEM_SOLVER,
+                                 Settings, find_object_by_typeid)
 from FreeCAD import Units
-from PySide import QtGui
-from PySide.QtGui import QDialog, QMessageBox, QTableWidgetItem
-from femmesh.gmshtools import GmshTools
-from femtools import ccxtools
-import FreeCAD,FreeCADGui,Part
-import PySide
-import json
-import time
+from PySide import QtCore, QtGui
+from PySide.QtGui import QMessageBox, QTableWidgetItem
+import FreeCAD,FreeCADGui
 
 MSGBOX_TITLE = "Iterative CCX Solver"
-FEMITERATE_VERSION = "0.0.1"
-
-TYPEID_FEM_MESH = "Fem::FemMeshObjectPython"
-TYPEID_FEM_ANALYSIS = "Fem::FemAnalysis"
-TYPEID_FEM_SOLVER = "Fem::FemSolverObjectPython"
 
 UI_BASE_PATH = FreeCAD.getUserMacroDir() + "FEMIterate"
 UI_MAIN_FILE_PATH = f"{UI_BASE_PATH}/main.ui"
@@ -22,35 +19,19 @@ UI_CHECK_FILE_PATH = f"{UI_BASE_PATH}/addcheck.ui"
 
 GUI_IN_SIDEBAR = True
 
-USERTYPE_NUMBER = "Number"
-USERTYPE_UNIT = "Unit"
-USERTYPE_PYTHON = "Python expr."
-
-BUILTIN_QUICK_EXPRESSIONS = [
-    "max(r.vonMises) < 100",
-    "max(r.Temperature) < 300"
-]
+# Lines kept in the log widget, older ones are removed
+LOG_WIDGET_LINES = 5000
 
+# SETTINGS_OPTIONS the panel has widgets for, the rest is set in the property editor
+PANEL_OPTIONS = ["mode", "parallel_jobs", "objective", "profile"]
 
-def find_object_by_typeid(type, match_label=None):
-    for obj in FreeCAD.ActiveDocument.Objects:
-        if obj.TypeId == type:
-            if match_label is None or obj.Label == match_label:
-                return obj
-    return None
 
-
-def _validate_python_expr(expr):
-    # TODO: Implement non-shit validation or remove completely
-    print(f"Validating: {expr}")
+def _validate_python_expr(expr, names=CHECK_NAMES):
     try:
-        # NOTE: Not unused, eval variabless
-        # x = 1.0
-        # i = 10
-        # i += eval(expr)
+        validate_expr(expr, names)
         return True
-    except Exception as e:
-        print(f"Validation error: {e}")
+    except CheckError as e:
+        print(f"Validation error in '{expr}': {e}")
         return False
 
 
@@ -108,12 +89,93 @@ class AddCheckWindow():
             self.form.accept()
         else:
             QMessageBox.information(None, MSGBOX_TITLE,
-                    "Provided expression did not evaluate!\nCheck the report view for error log.")
+                    "Provided expression is not valid!\nCheck the report view for error log.")
             return
 
     def _cb_cancel(self):
         self.form.close()
 
+class PropertyTableModel(QtCore.QAbstractTableModel):
+    """
+    Properties of an object for the Add Change dialog. Values are read and
+    formatted only when the view shows their row, shape and mesh properties
+    can take long to turn into strings. Sorting by value therefore only
+    orders the values formatted so far, the others follow by name.
+    """
+    HEADERS = ("Property", "Current value")
+
+    def __init__(self, obj):
+        super().__init__()
+        self._obj = obj
+        self._index = NameIndex(obj.PropertiesList)
+        self._names = self._index.names
+        # name index -> formatted value
+        self._values = {}
+        # name indexes of the rows shown, filtered and sorted
+        self._rows = list(range(len(self._names)))
+        self._sort = (0, QtCore.Qt.AscendingOrder)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole or not index.isValid():
+            return None
+        i = self._rows[index.row()]
+        if index.column() == 0:
+            return self._names[i]
+        return self._value(i)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def _value(self, i):
+        if i not in self._values:
+            try:
+                # slice it so we don't just stuff large strings into the table
+                self._values[i] = str(getattr(self._obj, self._names[i]))[:64]
+            # Some properties can't be read at all
+            except Exception as e:
+                self._values[i] = f"<{e}>"
+        return self._values[i]
+
+    def _sorted(self, rows):
+        (column, order) = self._sort
+        if column == 0:
+            key = lambda i: self._names[i].lower()
+        else:
+            key = lambda i: (i not in self._values, self._values.get(i, ""), self._names[i].lower())
+        return sorted(rows, key=key, reverse=order == QtCore.Qt.DescendingOrder)
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        self._sort = (column, order)
+        self._rows = self._sorted(self._rows)
+        self.layoutChanged.emit()
+
+    def filter(self, text):
+        self.beginResetModel()
+        self._rows = self._sorted(self._index.search(text))
+        self.endResetModel()
+
+    def name(self, row):
+        return self._names[self._rows[row]]
+
+    def row_of(self, name):
+        """
+        @returns row of a property or -1 if it is not shown
+        """
+        for (row, i) in enumerate(self._rows):
+            if self._names[i] == name:
+                return row
+        return -1
+
+
 class AddChangeWindow():
     def __init__(self, obj, selected_param=None, selected_value=None, selected_value_type=None):
         self.form = FreeCADGui.PySideUic.loadUi(UI_CHANGE_FILE_PATH)
@@ -121,70 +183,48 @@ class AddChangeWindow():
         self.prop = None
         self.value = None
         self.type = None
-        self.prop_type_lut = {}
 
         f = self.form
         f.buttonBox.accepted.connect(self._cb_accept)
         f.buttonBox.rejected.connect(self._cb_cancel)
         f.searchBox.textChanged.connect(self._search_fn)
 
-        tbl = f.propsTable
-        tbl.setRowCount(0)
-        rowcount = 0
-        for k in obj.PropertiesList:
-            v = getattr(obj, k)
-
-            # slice it so we don't just stuff large strings into the table
-            contents = str(v)[:64]
-
-            # TODO: Use prop types LUT for Python expr validation
-            self.prop_type_lut[k] = type(v)
-
-            tbl.insertRow(rowcount)
-            tbl.setItem(rowcount, 0, QTableWidgetItem(k))
-            tbl.setItem(rowcount, 1, QTableWidgetItem(contents))
+        # NOTE: keep a reference, the view does not own the model
+        self.model = PropertyTableModel(obj)
+        f.propsTable.setModel(self.model)
 
-            # Highlight selected value if we're in edit dialog
-            if k == selected_param:
-                tbl.selectRow(rowcount)
-
-            rowcount += 1
+        # Highlight selected value if we're in edit dialog
+        row = self.model.row_of(selected_param)
+        if row >= 0:
+            f.propsTable.selectRow(row)
 
         if selected_value:
             f.valueEdit.setText(selected_value)
 
     def _search_fn(self, text):
-        match = self.form.propsTable.findItems(text, PySide.QtCore.Qt.MatchFlag.MatchStartsWith)
-        match_rows = [m.row() for m in match]
-
-        for row in range(self.form.propsTable.rowCount()):
-            # Show matched rows or all rows if we cleared the textbox
-            if row in match_rows or len(text) == 0:
-                self.form.propsTable.showRow(row)
-            else:
-                self.form.propsTable.hideRow(row)
+        self.model.filter(text)
 
     def _cb_accept(self):
         val = self.form.valueEdit.text()
 
-        selected_row = self.form.propsTable.currentRow()
+        selected = self.form.propsTable.currentIndex()
 
         if not val:
             QMessageBox.information(None, MSGBOX_TITLE, "No value entered")
             return
-        if selected_row < 0:
+        if not selected.isValid():
             QMessageBox.information(None, MSGBOX_TITLE, "No property selected")
             return
 
         self.value = val
-        self.prop = self.form.propsTable.item(selected_row, 0).text()
+        self.prop = self.model.name(selected.row())
 
         typ = self.form.typeBox.currentText()
         if typ == "Python expression":
             self.type = USERTYPE_PYTHON
-            if not _validate_python_expr(val):
+            if not _validate_python_expr(val, CHANGE_NAMES):
                 QMessageBox.information(None, MSGBOX_TITLE,
-                        "Expression evaluation failed.\nCheck the Python console for error log.")
+                        "Expression is not valid.\nCheck the Python console for error log.")
                 return
         elif typ == "Unit string":
             self.type = USERTYPE_UNIT
@@ -205,65 +245,72 @@ class AddChangeWindow():
         self.form.close()
 
 
-class Settings():
-    def __init__(self):
-        self.changes = {}
-        self.checks = []
-        self.iteration_limit = 20
-        self.csv_suffix = "femiterate.csv"
-        self.quick_expressions = BUILTIN_QUICK_EXPRESSIONS
-        self._obj = None
-
-        self._obj = find_object_by_typeid("App::FeaturePython", "FEMIterateSettings")
-        if not self._obj:
-            self._obj = self.create_new()
-        else:
-            self.load()
-
-    def create_new(self):
-        obj = FreeCAD.ActiveDocument.addObject("App::FeaturePython", "FEMIterateSettings")
-        # General configuration
-        obj.addProperty("App::PropertyInteger", "IterationLimit", "Configuration", "")
-        obj.addProperty("App::PropertyString", "CsvSuffix", "Configuration", "")
-        # TODO: probably should check if we're missing some settings on load if we're a newer ver
-        obj.addProperty("App::PropertyString", "FEMIterateVersion", "Configuration", "")
-        # Quick expressions
-        obj.addProperty("App::PropertyString", "QuickExpressions", "Configuration", "")
-        # Parameters
-        obj.addProperty("App::PropertyString", "Changes", "Parameters", "")
-        obj.addProperty("App::PropertyString", "Checks", "Parameters", "")
-
-        self._obj = obj
-        self.save()
-        return obj
-
-    def load(self):
-        self.iteration_limit = self._obj.IterationLimit
-        self.csv_suffix = self._obj.CsvSuffix
-
-        # No need to load FEMIterateVersion
-        self.quick_expressions = json.loads(self._obj.QuickExpressions)
-
-        # TODO: check if we still actually have these objects and
-        # fill the "orig" field with latest data.
-        self.changes = json.loads(self._obj.Changes)
-        self.checks = json.loads(self._obj.Checks)
-
-    def save(self):
-        self._obj.IterationLimit = self.iteration_limit
-        self._obj.CsvSuffix = self.csv_suffix
+class DocumentCaller(QtCore.QObject):
+    """
+    Runs the document steps of the engine on the GUI thread. The engine
+    thread blocks until the call returned, exceptions are raised there.
+    """
+    _call = QtCore.Signal(object)
 
-        self._obj.FEMIterateVersion = FEMITERATE_VERSION
-        self._obj.QuickExpressions = json.dumps(self.quick_expressions)
+    def __init__(self):
+        super().__init__()
+        self._outcome = None
+        self._call.connect(self._run, QtCore.Qt.BlockingQueuedConnection)
 
-        self._obj.Changes = json.dumps(self.changes)
-        self._obj.Checks = json.dumps(self.checks)
+    def _run(self, fn):
+        try:
+            self._outcome = (fn(), None)
+        except BaseException as e:
+            self._outcome = (None, e)
+
+    def __call__(self, fn):
+        # NOTE: a blocking queued call into our own thread would deadlock
+        if QtCore.QThread.currentThread() == self.thread():
+            return fn()
+        self._call.emit(fn)
+        (value, error) = self._outcome
+        self._outcome = None
+        if error is not None:
+            raise error
+        return value
+
+
+class CalculationWorker(QtCore.QObject):
+    """
+    Runs an IterationEngine on a QThread. Log messages and progress go to a
+    LogSink which the GUI thread drains on a timer, only the end of the run
+    is signalled. Document changes go through caller to the GUI thread.
+    """
+    finished = QtCore.Signal()
+
+    def __init__(self, engine, sink, caller):
+        super().__init__()
+        self.engine = engine
+        engine.on_document = caller
+        engine.on_log = sink.log
+        engine.on_progress = sink.progress
+        engine.on_iteration_done = lambda i, passed, res: sink.log(
+                f"Iteration {i+1} {'passed' if passed else 'failed'} checks "
+                f"({res.Label if res else ''})")
+
+    def run(self):
+        try:
+            self.engine.run()
+        finally:
+            self.finished.emit()
 
 
 class MainWindow():
     def __init__(self, doc):
         self.form = FreeCADGui.PySideUic.loadUi(UI_MAIN_FILE_PATH)
         self._calculation_running = False
+        self._worker = None
+        self._worker_thread = None
+        self._document_caller = None
+        self._log_sink = None
+        self._log_timer = QtCore.QTimer()
+        self._log_timer.setInterval(int(LOG_FLUSH_INTERVAL * 1000))
+        self._log_timer.timeout.connect(self._flush_log)
 
         self._settings = Settings()
         self._apply_settings()
@@ -276,6 +323,7 @@ class MainWindow():
 
         f.progressBar.setVisible(False)
         f.progressText.setVisible(False)
+        f.logBox.document().setMaximumBlockCount(LOG_WIDGET_LINES)
 
         f.objectsAutoButton.clicked.connect(lambda:
                 self._find_mesh_and_analysis_objects(True))
@@ -290,10 +338,21 @@ class MainWindow():
                     f.solverEdit, TYPEID_FEM_SOLVER))
 
         f.calculateButton.clicked.connect(self._calculate)
+        f.cancelButton.clicked.connect(self._cb_cancel_calculation)
 
         # Options
         f.iterationLimitEdit.valueChanged.connect(lambda v:
                 self._cb_iteration_limit_changed(v))
+        f.csvFilenameEdit.textChanged.connect(lambda v:
+                setattr(self._settings, "csv_suffix", v))
+        f.modeBox.currentTextChanged.connect(lambda v:
+                setattr(self._settings, "mode", v))
+        f.parallelJobsEdit.valueChanged.connect(lambda v:
+                setattr(self._settings, "parallel_jobs", v))
+        f.objectiveEdit.textChanged.connect(lambda v:
+                setattr(self._settings, "objective", v))
+        f.profileCheck.toggled.connect(lambda v:
+                setattr(self._settings, "profile", v))
 
         # NOTE: tables modify_X are called from a lambda because we don't
         # want Qt to mangle the first argument (which is None to indicate
@@ -339,6 +398,11 @@ class MainWindow():
 
         f.iterationLimitEdit.setValue(s.iteration_limit)
         f.csvFilenameEdit.setText(s.csv_suffix)
+        f.modeBox.addItems(MODES)
+        f.modeBox.setCurrentText(s.mode)
+        f.parallelJobsEdit.setValue(s.parallel_jobs)
+        f.objectiveEdit.setText(s.objective)
+        f.profileCheck.setChecked(s.profile)
 
         # Apply changes to table
         if s.changes is not None:
@@ -383,81 +447,55 @@ class MainWindow():
 
         return ret
 
-    @staticmethod
-    def _apply_delta_changes(changes_dict):
-        for (objname, changes) in changes_dict.items():
-            obj = FreeCAD.ActiveDocument.getObject(objname)
-            for (prop, change) in changes.items():
-                prev = getattr(obj, prop)
-
-                if change["type"] == USERTYPE_UNIT:
-                    new_val = prev + Units.Quantity(change["val"])
-                    setattr(obj, prop, new_val)
-                else:
-                    print(f"No support for user type {change['type']} yet...")
-
-    @staticmethod
-    def _revert_delta_changes(changes_dict):
-        for (objname, changes) in changes_dict.items():
-            obj = FreeCAD.ActiveDocument.getObject(objname)
-            for (prop, change) in changes.items():
-                setattr(obj, prop, change["orig"])
-
-    def _find_rename_latest_result(self, cur_iteration):
-        # TODO HACK: we assume that the latest FEM result obj is our result, there probably
-        # is a better way. This could cause some bugs later on.
-        for femobj in self._fem_analysis.Group:
-            if femobj.isDerivedFrom("Fem::FemResultObject") and not femobj.Label.startswith("Iteration"):
-                femobj.Label = f"Iteration{cur_iteration}"
-                return femobj
-        return None
-
-    @staticmethod
-    def _eval_checks(checks, result, iteration):
-        for expr in checks:
-            # NOTE: not unused, these are for access from user expression
-            i = iteration
-            r = result
-            ret = eval(expr)
-
-            if ret is not True:
-                return False
-        return True
-
-    @staticmethod
-    def _calculate_single_shot(fea, changes, checks, iteration, logBox, fem_mesh):
-        """
-        @returns Tri-state logic.
-                 None indicates loop-again, True indicates that we found the
-                 correct solution and False indicates that something went wrong
-        """
-        logBox.append("Applying changes...")
-        MainWindow._apply_delta_changes(changes)
-
-        doc = FreeCAD.ActiveDocument
-
-        logBox.append("Meshing...")
-        doc.recompute()
-        fem_mesh.create_mesh()
-
-        logBox.append("Solving...")
-        fea.update_objects()
-        fea.setup_working_dir()
-        fea.setup_ccx()
-        fem_msg = fea.check_prerequisites()
-
-        if not fem_msg:
-            fea.write_inp_file()
-            fea.ccx_run()
-            fea.load_results()
-        else:
-            logBox.append(f"CCX setup error: {fem_msg}")
-            return False
+    def _cb_cancel_calculation(self):
+        if self._worker:
+            self.form.logBox.append("<b>Cancelling...</b>")
+            self.form.cancelButton.setEnabled(False)
+            self._worker.engine.cancel()
 
-        return None
+    def _flush_log(self):
+        if not self._log_sink:
+            return
+        (lines, progress) = self._log_sink.take()
+
+        if lines:
+            box = self.form.logBox
+            scrollbar = box.verticalScrollBar()
+            at_bottom = scrollbar.value() == scrollbar.maximum()
+
+            # NOTE: one edit block so the widget lays out once per flush
+            cursor = QtGui.QTextCursor(box.document())
+            cursor.movePosition(QtGui.QTextCursor.End)
+            cursor.beginEditBlock()
+            for line in lines:
+                if not box.document().isEmpty():
+                    cursor.insertBlock()
+                # Don't carry bold over from the previous line
+                cursor.setCharFormat(QtGui.QTextCharFormat())
+                cursor.insertHtml(line)
+            cursor.endEditBlock()
+
+            if at_bottom:
+                scrollbar.setValue(scrollbar.maximum())
+
+        if progress:
+            self.form.progressBar.setValue(progress[0])
+            self.form.progressText.setText(progress[1])
+
+    def _set_inputs_enabled(self, enabled):
+        f = self.form
+        for widget in (f.calculateButton, f.changesAdd, f.changesEdit, f.changesRemove,
+                       f.checksAdd, f.checksEdit, f.checksRemove, f.iterationLimitEdit,
+                       f.csvFilenameEdit, f.modeBox, f.parallelJobsEdit, f.objectiveEdit,
+                       f.profileCheck):
+            widget.setEnabled(enabled)
+        f.cancelButton.setEnabled(not enabled)
 
     def _calculate(self):
-        self._settings.save()
+        if self._calculation_running:
+            return
+
+        self._settings.save(PANEL_OPTIONS)
 
         print("Starting solving...")
 
@@ -473,75 +511,57 @@ class MainWindow():
 
         self._calculation_running = True
 
-        max_iterations = self._settings.iteration_limit
-        print(f"Max iterations: {max_iterations}")
-
-        start_time = time.time()
-
         # Show Log tab and progress bar
         self.form.tabWidget.setCurrentIndex(2)
+        self.form.progressBar.setValue(0)
         self.form.progressBar.setVisible(True)
         self.form.progressText.setVisible(True)
-
-        # Aggregate all checks and changes from table cells
-
-        # Loop until we hit max iterations or a check passes
-        condition_fail = False
-        iteration = 0
-
-        changes = self._settings.changes
-        checks = self._settings.checks
-
-        try:
-            # NOTE: we pick out the analysis and solver ourselves because for
-            # some reason ccxtools did not find it at times. No idea why.
-            fea = ccxtools.FemToolsCcx(analysis=self._fem_analysis, solver=self._fem_solver)
-            fea.purge_results()
-        # ccxtools throws raw Exceptions, not a lazy catch-all here
-        except Exception as e:
-            self.form.logBox.append(f"<b>{e}</b>")
-            condition_fail = True
-
-        while not condition_fail and iteration < max_iterations:
-            self.form.progressBar.setValue(float(iteration+1) / float(max_iterations) * 100)
-            self.form.progressText.setText(f"Running iteration {iteration+1}/{max_iterations}")
-            self.form.logBox.append(f"<b>Running iteration {iteration+1}</b>")
-
-            ret = self._calculate_single_shot(fea, changes, checks,
-                                              iteration, self.form.logBox, self._fem_mesh)
-            if ret is not None:
-                if ret is False:
-                    condition_fail = True
-                break
-
-            self.form.logBox.append("Checking...")
-            current_result = self._find_rename_latest_result(iteration)
-
-            if self._eval_checks(checks, current_result, iteration):
-                self.form.logBox.append("All checks passed!")
-                break
-
-            iteration += 1
-
-        if iteration == max_iterations:
-            self.form.logBox.append(f"<b>Hit iteration limit without finding a solution</b>")
-
-        if condition_fail:
+        self._set_inputs_enabled(False)
+
+        engine = IterationEngine(self._fem_analysis, self._fem_solver, self._fem_mesh,
+                                 self._settings)
+        self._log_sink = LogSink(self._settings.log_file_name())
+
+        # NOTE: the worker has no parent so it can be moved to the thread,
+        # keep references around so neither gets garbage collected mid-run.
+        self._document_caller = DocumentCaller()
+        self._worker = CalculationWorker(engine, self._log_sink, self._document_caller)
+        self._worker_thread = QtCore.QThread()
+        self._worker.moveToThread(self._worker_thread)
+
+        # NOTE: explicitly queued, the slots touch widgets and must run on the GUI thread
+        queued = QtCore.Qt.QueuedConnection
+        self._worker.finished.connect(self._calculation_finished, queued)
+        self._worker_thread.started.connect(self._worker.run)
+
+        self._log_timer.start()
+        self._worker_thread.start()
+
+    def _calculation_finished(self):
+        engine = self._worker.engine
+
+        self._worker_thread.quit()
+        self._worker_thread.wait()
+        self._worker = None
+        self._document_caller = None
+        self._worker_thread = None
+
+        self._log_timer.stop()
+        self._flush_log()
+        self._log_sink.close()
+        self._log_sink = None
+
+        if engine.failed or engine.cancelled or engine.timed_out:
             # Hide progressbars on failure since they can be in a weird state
             self.form.progressBar.setVisible(False)
             self.form.progressText.setVisible(False)
-            self.form.logBox.append(f"<b>Had an error!</b>")
-
-        self.form.logBox.append("Restoring original values...")
-        self._revert_delta_changes(changes)
 
         self.form.logBox.append("<b>Done!</b>")
 
-        elapsed_time = round(time.time() - start_time, 1)
-        print(f"Solving finished in {elapsed_time} s")
-
-        self.form.progressText.setText(f"Finished in {elapsed_time} s, computed {iteration+1} iterations")
+        self.form.progressText.setText(
+                f"Finished in {engine.elapsed_time} s, computed {engine.iteration+1} iterations")
         self.form.progressBar.setVisible(False)
+        self._set_inputs_enabled(True)
         self._calculation_running = False
 
     def _modify_checks(self, modify_row_idx=None):
@@ -645,7 +665,7 @@ class MainWindow():
 
         if mesh:
             found_something = True
-            self._set_objects_tab_val("_fem_mesh", GmshTools(mesh), f.meshEdit, None, mesh.Label)
+            self._set_objects_tab_val("_fem_mesh", mesh, f.meshEdit)
             print(f"Found mesh {mesh.Label}")
         if an:
             found_something = True
@@ -667,7 +687,10 @@ class MainWindow():
         self.form.exec_()
 
     def accept(self):
-        self._settings.save()
+        if self._calculation_running:
+            QMessageBox.information(None, MSGBOX_TITLE, "Cancel the running calculation first")
+            return
+        self._settings.save(PANEL_OPTIONS)
         if GUI_IN_SIDEBAR:
             FreeCADGui.Control.closeDialog()
 
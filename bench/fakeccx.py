@@ -0,0 +1,47 @@
+"""
+Fake ccx for the benchmarks, called as "fakeccx.py -i <job>" in the working
+directory. Sleeps for FEMITERATE_BENCH_SOLVE_LATENCY seconds and writes an
+ASCII .frd with a STRESS block for every node of the deck. Meanwhile the
+first increment is cut back FEMITERATE_BENCH_CUTBACKS times in the .cvg.
+"""
+import numpy as np
+import os
+import sys
+import time
+
+
+def main(argv):
+    job = argv[argv.index("-i") + 1]
+    nodes = 0
+    stress = 0.0
+    with open(job + ".inp") as f:
+        for line in f:
+            if line.startswith("** BENCH_NODES="):
+                nodes = int(line.split("=")[1])
+            elif line.startswith("** BENCH_STRESS="):
+                stress = float(line.split("=")[1])
+            elif not line.startswith("**"):
+                break
+
+    latency = float(os.environ.get("FEMITERATE_BENCH_SOLVE_LATENCY", "0"))
+    cutbacks = int(os.environ.get("FEMITERATE_BENCH_CUTBACKS", "0"))
+    with open(job + ".cvg", "w") as f:
+        f.write("   SUMMARY OF C0NVERGENCE INFORMATION\n  STEP   INC  ATT  ITER\n")
+        for att in range(1, cutbacks + 2):
+            f.write(f"{1:6d}{1:6d}{att:5d}{1:5d}        0  0.1000E+03  0.1000E+03\n")
+            f.flush()
+            time.sleep(latency / (cutbacks + 1))
+
+    values = stress * (1.0 + 0.1 * np.random.default_rng(nodes).random(nodes))
+    lines = [f" -1{n:10d}{v:12.5E}{0.0:12.5E}{0.0:12.5E}{0.0:12.5E}{0.0:12.5E}{0.0:12.5E}"
+             for (n, v) in enumerate(values, 1)]
+    with open(job + ".frd", "w") as f:
+        f.write("    1C\n    1PSTEP\n")
+        f.write(" -4  STRESS      6    1\n")
+        f.write("\n".join(lines))
+        f.write("\n -3\n 9999\n")
+    open(job + ".dat", "w").close()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
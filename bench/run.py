@@ -0,0 +1,264 @@
+"""
+Offline benchmark of the FEMIterate orchestration. FreeCAD, Gmsh and ccx
+are replaced by the stand-ins in bench/stubs and bench/fakeccx.py, so this
+runs on any machine with Python and NumPy:
+
+    python3 bench/run.py [--mode Sequential] [--iterations 20] [--rounds 3]
+                         [--nodes 10000] [--solve-latency 0.05] [--json out.json]
+
+Reports the cost of the individual building blocks, iterations per second
+and per-phase times of whole runs, and how memory grows from run to run.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import resource
+import shutil
+import stat
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(BENCH_DIR, "stubs"), os.path.dirname(BENCH_DIR)]
+
+import FreeCAD  # noqa: E402
+from FEMIterate.changeplan import USERTYPE_UNIT, ChangePlan  # noqa: E402
+from FEMIterate.checks import CompiledChecks, make_env  # noqa: E402
+from FEMIterate.engine import IterationEngine  # noqa: E402
+from FEMIterate.frdreader import read_frd  # noqa: E402
+from FEMIterate.settings import MODES, Settings  # noqa: E402
+from FEMIterate.timing import PHASES  # noqa: E402
+
+
+def rss_mb():
+    """
+    @returns current resident set size, peak if the current one is unknown
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def make_ccx(tmp_dir):
+    """
+    @returns executable that runs fakeccx.py with this interpreter
+    """
+    path = os.path.join(tmp_dir, "ccx")
+    with open(path, "w") as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(BENCH_DIR, "fakeccx.py")}" "$@"\n')
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
+
+
+def make_document(nodes, unrelated=0):
+    doc = FreeCAD.newDocument("Bench")
+    # Features of the rest of the assembly, the changes don't touch them
+    for _ in range(unrelated):
+        doc.addObject("Part::Feature", "Feature")
+
+    box = doc.addObject("Part::Box", "Box")
+    box.Length = FreeCAD.Quantity("10.0 mm")
+    box.Width = FreeCAD.Quantity("10.0 mm")
+    box.Height = FreeCAD.Quantity("10.0 mm")
+    box.Shape = FreeCAD.Shape(box)
+
+    analysis = doc.addObject("Fem::FemAnalysis", "Analysis")
+    solver = doc.addObject("Fem::FemSolverObjectPython", "CalculiXccxTools")
+    mesh = doc.addObject("Fem::FemMeshObjectPython", "FEMMeshGmsh", bases=("Fem::FemMeshObject",))
+    mesh.Part = box
+    mesh.CharacteristicLengthMax = FreeCAD.Quantity(f"{FreeCAD.CONFIG['characteristic_length']} mm")
+    mesh.CharacteristicLengthMin = FreeCAD.Quantity("0.0 mm")
+    mesh.FemMesh = FreeCAD.FemMesh(nodes)
+    mesh.OutList = [box]
+    box.InList = [mesh]
+    analysis.Group = [solver, mesh]
+    return (doc, analysis, solver, mesh)
+
+
+def per_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def micro_benchmarks(settings, frd_file_name, repeat):
+    """
+    @returns {name: seconds per call}
+    """
+    results = {}
+    results["settings save+load"] = per_call(lambda: (settings.save(), settings.load()), repeat)
+
+    plan = ChangePlan(settings.changes, settings.iteration_limit)
+    results["plan changes"] = per_call(lambda: ChangePlan(settings.changes, settings.iteration_limit),
+                                       max(1, repeat // 10))
+
+    def apply_revert():
+        plan.apply(1)
+        plan.revert(settings.changes)
+    results["apply+revert changes"] = per_call(apply_revert, repeat)
+
+    fields = ["vonMises"]
+    results["read_frd"] = per_call(lambda: read_frd(frd_file_name, fields), max(1, repeat // 10))
+
+    result = read_frd(frd_file_name, fields)
+    checks = CompiledChecks(settings.checks)
+    results["check evaluation"] = per_call(lambda: checks.evaluate(make_env(result, 0)), repeat)
+    return results
+
+
+def run_rounds(args, settings, analysis, solver, mesh):
+    rounds = []
+    for n in range(args.rounds):
+        messages = []
+
+        def log(msg, important=False):
+            if important:
+                messages.append(msg)
+            if args.verbose:
+                print(msg)
+
+        engine = IterationEngine(analysis, solver, mesh, settings, log=log)
+        with contextlib.ExitStack() as stack:
+            if not args.verbose:
+                stack.enter_context(contextlib.redirect_stdout(open(os.devnull, "w")))
+            start = time.perf_counter()
+            engine.run()
+            wall = time.perf_counter() - start
+        # NOTE: a failed run measures nothing, don't report it as if it did
+        if engine.failed:
+            sys.exit("Benchmark run failed:\n  " + "\n  ".join(messages[-5:]))
+
+        gc.collect()
+        stats = engine._timer.stats()
+        iterations = stats["check"][0] if "check" in stats else 0
+        ccx_total = stats["ccx"][0] * stats["ccx"][2] if "ccx" in stats else 0.0
+        rounds.append({
+            "round": n + 1,
+            "wall": wall,
+            "iterations": iterations,
+            "iterations_per_s": iterations / wall if wall > 0 else 0.0,
+            "overhead_per_iteration": (wall - ccx_total) / iterations if iterations else 0.0,
+            "phase_mean": {phase: stats[phase][2] for phase in PHASES if phase in stats},
+            "rss_mb": rss_mb(),
+            "objects": len(FreeCAD.ActiveDocument.Objects),
+        })
+    return rounds
+
+
+def report(config, micro, rounds):
+    print(f"FEMIterate benchmark: {config['mode']} mode, {config['iterations']} iterations x "
+          f"{config['rounds']} rounds, {config['nodes']} nodes, "
+          f"{config['solve_latency'] * 1e3:.0f} ms solves")
+    print()
+    print("Building blocks, per call:")
+    for (name, seconds) in micro.items():
+        print(f"  {name:24s} {seconds * 1e6:10.1f} us")
+    print()
+    print(f"  {'round':>5s} {'wall [s]':>9s} {'it/s':>7s} {'overhead/it [ms]':>17s} "
+          f"{'RSS [MB]':>9s} {'objects':>8s}")
+    for r in rounds:
+        print(f"  {r['round']:5d} {r['wall']:9.2f} {r['iterations_per_s']:7.2f} "
+              f"{r['overhead_per_iteration'] * 1e3:17.1f} {r['rss_mb']:9.1f} {r['objects']:8d}")
+    print()
+    print("Phase means of the last round [ms]:")
+    last = rounds[-1]["phase_mean"]
+    print("  " + "  ".join(f"{phase} {last[phase] * 1e3:.1f}" for phase in PHASES if phase in last))
+    if len(rounds) > 1:
+        growth = rounds[-1]["rss_mb"] - rounds[0]["rss_mb"]
+        print(f"Memory growth after the first round: {growth:+.1f} MB "
+              f"({growth / (len(rounds) - 1):+.2f} MB per round)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FEMIterate orchestration benchmark")
+    parser.add_argument("--mode", choices=MODES, default=MODES[0])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3, help="runs, memory growth is measured over them")
+    parser.add_argument("--nodes", type=int, default=10000)
+    parser.add_argument("--solve-latency", type=float, default=0.0, help="seconds per fake ccx run")
+    parser.add_argument("--mesh-latency", type=float, default=0.0, help="seconds per fake Gmsh run")
+    parser.add_argument("--recompute-latency", type=float, default=0.0,
+                        help="seconds per recompute of the whole document")
+    parser.add_argument("--unrelated", type=int, default=0,
+                        help="objects in the document the changes don't affect")
+    parser.add_argument("--full-recompute", action="store_true",
+                        help="recompute the whole document every iteration")
+    parser.add_argument("--brep-size", type=int, default=100000, help="characters of the fake BREP")
+    parser.add_argument("--check", default="max(r.vonMises) < 0",
+                        help="check expression, the default never passes so every iteration runs")
+    parser.add_argument("--coarse-mesh", type=float, default=1.0,
+                        help="explore on a mesh this many times as coarse in sequential mode")
+    parser.add_argument("--scratch", type=int, metavar="MB", default=0,
+                        help="use scratch working directories with this size limit")
+    parser.add_argument("--cutbacks", type=int, default=0, help="cutbacks of every fake ccx run")
+    parser.add_argument("--ccx-timeout", type=float, default=0.0, help="CcxTimeout setting")
+    parser.add_argument("--max-cutbacks", type=int, default=0, help="MaxCutbacks setting")
+    parser.add_argument("--no-fast-results", action="store_true", help="import full results every iteration")
+    parser.add_argument("--micro-repeat", type=int, default=1000)
+    parser.add_argument("--json", metavar="FILE", help="also write the results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="print the engine log")
+    args = parser.parse_args(argv)
+
+    tmp_dir = tempfile.mkdtemp(prefix="femiterate-bench-")
+    try:
+        FreeCAD.CONFIG.update({
+            "nodes": args.nodes,
+            "brep_size": args.brep_size,
+            "recompute_latency": args.recompute_latency,
+            "mesh_latency": args.mesh_latency,
+            "ccx_binary": make_ccx(tmp_dir),
+            "data_dir": tmp_dir,
+        })
+        os.environ["FEMITERATE_BENCH_SOLVE_LATENCY"] = str(args.solve_latency)
+        os.environ["FEMITERATE_BENCH_CUTBACKS"] = str(args.cutbacks)
+        tempfile.tempdir = tmp_dir
+
+        (doc, analysis, solver, mesh) = make_document(args.nodes, args.unrelated)
+        settings = Settings()
+        settings.changes = {"Box": {"Length": {"type": USERTYPE_UNIT, "val": "1.0 mm",
+                                               "orig": "10.0 mm"}}}
+        settings.checks = [args.check]
+        settings.iteration_limit = args.iterations
+        settings.mode = args.mode
+        settings.fast_results = not args.no_fast_results
+        settings.result_cache_size = 0
+        settings.resume = False
+        settings.scoped_recompute = not args.full_recompute
+        settings.coarse_mesh = args.coarse_mesh
+        settings.scratch = args.scratch > 0
+        settings.scratch_size = args.scratch
+        settings.ccx_timeout = args.ccx_timeout
+        settings.max_cutbacks = args.max_cutbacks
+        settings.save()
+
+        # One run to have an .frd for the building block benchmarks
+        warmup = run_rounds(argparse.Namespace(rounds=1, verbose=False), settings, analysis, solver, mesh)
+        frd_file_name = None
+        for (root, _, files) in os.walk(tmp_dir):
+            if "FEMMeshGmsh.frd" in files:
+                frd_file_name = os.path.join(root, "FEMMeshGmsh.frd")
+        micro = micro_benchmarks(settings, frd_file_name, args.micro_repeat) if frd_file_name else {}
+        del warmup
+
+        rounds = run_rounds(args, settings, analysis, solver, mesh)
+
+        config = {k: getattr(args, k) for k in ("mode", "iterations", "rounds", "nodes", "solve_latency",
+                                                "mesh_latency", "recompute_latency", "unrelated", "full_recompute",
+                                                "coarse_mesh", "scratch", "cutbacks", "ccx_timeout",
+                                                "max_cutbacks", "brep_size", "check")}
+        report(config, micro, rounds)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"config": config, "micro": micro, "rounds": rounds}, f, indent=1)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
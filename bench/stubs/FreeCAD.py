@@ -0,0 +1,195 @@
+"""
+Stand-in for the parts of the FreeCAD API that FEMIterate uses, so the
+orchestration can be benchmarked without FreeCAD. Only what the macro
+touches is implemented.
+"""
+import numpy as np
+import os
+import re
+import tempfile
+import time
+
+# Set by bench/run.py
+CONFIG = {
+    "nodes": 10000,
+    "characteristic_length": 2.0,
+    "brep_size": 100000,
+    "recompute_latency": 0.0,
+    "mesh_latency": 0.0,
+    "ccx_binary": "ccx",
+    "data_dir": tempfile.gettempdir(),
+}
+
+_QUANTITY_RE = re.compile(r"^\s*([-+0-9.eE]+)\s*(.*)$")
+
+
+class Quantity():
+    def __init__(self, value=0.0, unit=""):
+        if isinstance(value, Quantity):
+            (value, unit) = (value.Value, value.Unit)
+        elif isinstance(value, str):
+            m = _QUANTITY_RE.match(value)
+            (value, unit) = (float(m.group(1)), m.group(2).strip())
+        self.Value = float(value)
+        self.Unit = unit
+
+    def __add__(self, other):
+        other = Quantity(other)
+        return Quantity(self.Value + other.Value, self.Unit or other.Unit)
+
+    def __sub__(self, other):
+        return self + Quantity(other) * -1.0
+
+    def __mul__(self, k):
+        return Quantity(self.Value * float(k), self.Unit)
+
+    __rmul__ = __mul__
+
+    def __eq__(self, other):
+        return isinstance(other, Quantity) and (self.Value, self.Unit) == (other.Value, other.Unit)
+
+    def __float__(self):
+        return self.Value
+
+    def __str__(self):
+        return f"{self.Value} {self.Unit}".strip()
+
+
+class Units():
+    Quantity = Quantity
+
+
+_PROPERTY_DEFAULTS = {
+    "App::PropertyInteger": 0,
+    "App::PropertyFloat": 0.0,
+    "App::PropertyBool": False,
+}
+
+# Attributes of DocumentObject which are not properties
+_INTERNAL = {"Document", "TypeId", "Name", "InList", "OutList", "Bases", "State"}
+
+
+class DocumentObject():
+    def __init__(self, doc, type_id, name, bases=()):
+        self.Document = doc
+        self.TypeId = type_id
+        self.Name = name
+        self.Label = name
+        self.InList = []
+        self.OutList = []
+        self.Bases = set(bases)
+        self.State = []
+
+    @property
+    def PropertiesList(self):
+        return [k for k in self.__dict__ if k[0].isupper() and k not in _INTERNAL]
+
+    def addProperty(self, type_id, name, group="", tooltip=""):
+        setattr(self, name, _PROPERTY_DEFAULTS.get(type_id, ""))
+
+    def __setattr__(self, name, value):
+        # Quantity properties accept strings like "10 mm"
+        if isinstance(value, str) and isinstance(self.__dict__.get(name), Quantity):
+            value = Quantity(value)
+        object.__setattr__(self, name, value)
+
+    def getEditorMode(self, name):
+        return self.__dict__.get("_editor_modes", {}).get(name, [])
+
+    def setEditorMode(self, name, mode):
+        self.__dict__.setdefault("_editor_modes", {})[name] = list(mode)
+
+    def isTouched(self):
+        return False
+
+    def isDerivedFrom(self, type_id):
+        return self.TypeId == type_id or type_id in self.Bases
+
+
+class Shape():
+    """
+    BREP export is what the mesh cache hashes, its size is configurable.
+    """
+    def __init__(self, box):
+        self._box = box
+
+    def exportBrepToString(self):
+        head = f"box {self._box.Length} {self._box.Width} {self._box.Height}\n"
+        return head + "x" * CONFIG["brep_size"]
+
+    @property
+    def Volume(self):
+        return float(self._box.Length) * float(self._box.Width) * float(self._box.Height)
+
+
+class FemMesh():
+    def __init__(self, nodes):
+        self.Nodes = np.random.default_rng(0).random((nodes, 3))
+
+    @property
+    def NodeCount(self):
+        return len(self.Nodes)
+
+    def copy(self):
+        mesh = FemMesh(0)
+        mesh.Nodes = self.Nodes.copy()
+        return mesh
+
+
+class Document():
+    def __init__(self, name):
+        self.Name = name
+        self.FileName = ""
+        self.Objects = []
+
+    def addObject(self, type_id, name, bases=()):
+        unique = name
+        n = 1
+        while self.getObject(unique) is not None:
+            unique = f"{name}{n:03d}"
+            n += 1
+        obj = DocumentObject(self, type_id, unique, bases)
+        self.Objects.append(obj)
+        return obj
+
+    def getObject(self, name):
+        for obj in self.Objects:
+            if obj.Name == name:
+                return obj
+        return None
+
+    def removeObject(self, name):
+        obj = self.getObject(name)
+        self.Objects.remove(obj)
+        for other in self.Objects:
+            if obj in other.OutList:
+                other.OutList.remove(obj)
+            if obj in other.InList:
+                other.InList.remove(obj)
+            group = getattr(other, "Group", None)
+            if isinstance(group, list) and obj in group:
+                group.remove(obj)
+
+    def recompute(self, objs=None):
+        """
+        Takes recompute_latency for the whole document, a share of it for objs.
+        """
+        share = 1.0 if objs is None else len(objs) / max(1, len(self.Objects))
+        time.sleep(CONFIG["recompute_latency"] * share)
+
+
+ActiveDocument = None
+
+
+def newDocument(name):
+    global ActiveDocument
+    ActiveDocument = Document(name)
+    return ActiveDocument
+
+
+def getUserAppDataDir():
+    return CONFIG["data_dir"]
+
+
+def getUserMacroDir():
+    return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,21 @@
+"""
+Stand-in for Gmsh, takes the configured time and makes a mesh of the
+configured size at the configured characteristic length, fewer nodes on
+coarser ones.
+"""
+import FreeCAD
+import time
+
+
+class GmshTools():
+    def __init__(self, mesh_obj):
+        self.mesh_obj = mesh_obj
+
+    def create_mesh(self):
+        time.sleep(FreeCAD.CONFIG["mesh_latency"])
+        # 0 is automatic, Gmsh picks the configured length then
+        size = float(self.mesh_obj.CharacteristicLengthMax) or FreeCAD.CONFIG["characteristic_length"]
+        ratio = FreeCAD.CONFIG["characteristic_length"] / size
+        nodes = max(1, int(FreeCAD.CONFIG["nodes"] * ratio ** 3))
+        self.mesh_obj.FemMesh = FreeCAD.FemMesh(nodes)
+        return ""
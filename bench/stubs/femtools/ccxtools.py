@@ -0,0 +1,103 @@
+"""
+Stand-in for FemToolsCcx. The deck it writes has the configured number of
+nodes and a stress scale the fake ccx turns into results, importing reads
+the whole .frd line by line like the real importer does. Force constraints
+in the analysis get *CLOAD cards laid out like the ones ccxtools writes.
+"""
+import FreeCAD
+import os
+import tempfile
+
+
+class FemToolsCcx():
+    def __init__(self, analysis=None, solver=None):
+        self.analysis = analysis
+        self.solver = solver
+        self.ccx_binary = FreeCAD.CONFIG["ccx_binary"]
+        self.working_dir = os.path.join(tempfile.gettempdir(), "femiterate-bench")
+        self.inp_file_name = None
+        self.mesh = None
+        for obj in analysis.Group:
+            # Result meshes have no shape to mesh
+            if obj.isDerivedFrom("Fem::FemMeshObject") and hasattr(obj, "Part"):
+                self.mesh = obj
+                break
+
+    def _results(self):
+        return [o for o in self.analysis.Group if o.isDerivedFrom("Fem::FemResultObject")]
+
+    def purge_results(self):
+        doc = FreeCAD.ActiveDocument
+        for obj in self._results():
+            mesh = obj.Mesh
+            doc.removeObject(obj.Name)
+            doc.removeObject(mesh.Name)
+
+    def setup_ccx(self):
+        pass
+
+    def update_objects(self):
+        pass
+
+    def setup_working_dir(self, param_working_dir=None, create=False):
+        if param_working_dir:
+            self.working_dir = param_working_dir
+        os.makedirs(self.working_dir, exist_ok=True)
+
+    def check_prerequisites(self):
+        return ""
+
+    def write_inp_file(self):
+        self.inp_file_name = os.path.join(self.working_dir, "FEMMeshGmsh.inp")
+        box = self.mesh.Part
+        nodes = self.mesh.FemMesh.Nodes
+        with open(self.inp_file_name, "w") as f:
+            f.write(f"** BENCH_NODES={len(nodes)}\n")
+            f.write(f"** BENCH_STRESS={1000.0 / float(box.Length)}\n")
+            f.write("*NODE, NSET=Nall\n")
+            for (n, (x, y, z)) in enumerate(nodes, 1):
+                f.write(f"{n}, {x:.13E}, {y:.13E}, {z:.13E}\n")
+            f.write("*STEP\n*STATIC\n")
+            for obj in self.analysis.Group:
+                if obj.TypeId == "Fem::ConstraintForce":
+                    self._write_force(f, obj, nodes)
+            f.write("*END STEP\n")
+
+    @staticmethod
+    def _write_force(f, obj, nodes):
+        # Spread over the nodes at the far end in x
+        loaded = [n for (n, (x, _, _)) in enumerate(nodes, 1) if x > 0.9]
+        f.write("***********************************************************\n")
+        f.write("** Node loads Constraints\n")
+        f.write("*CLOAD\n")
+        f.write(f"** {obj.Label}\n")
+        f.write("** node loads on shape: Box:Face2\n")
+        for n in loaded:
+            f.write(f"{n},1,{float(obj.Force) / len(loaded):.13E}\n")
+        f.write("\n")
+
+    def load_results(self):
+        frd = os.path.splitext(self.inp_file_name)[0] + ".frd"
+        stresses = []
+        with open(frd) as f:
+            block = None
+            for line in f:
+                if line.startswith(" -4"):
+                    block = line[5:13].strip()
+                elif line.startswith(" -1") and block == "STRESS":
+                    stresses.append([float(line[13 + 12 * c:25 + 12 * c]) for c in range(6)])
+        if not stresses:
+            raise RuntimeError(f"No STRESS values in {frd}")
+
+        doc = FreeCAD.ActiveDocument
+        mesh = doc.addObject("Fem::FemMeshObject", "ResultMesh")
+        mesh.FemMesh = self.mesh.FemMesh.copy()
+        result = doc.addObject("Fem::FemResultObjectPython", "CCX_Results",
+                               bases=("Fem::FemResultObject",))
+        result.Mesh = mesh
+        mesh.InList = [result]
+        result.NodeNumbers = list(range(1, len(stresses) + 1))
+        result.vonMises = [abs(s[0]) for s in stresses]
+        result.Temperature = []
+        self.analysis.Group.append(result)
+        self.analysis.Group.append(mesh)
@@ -0,0 +1,178 @@
+"""
+Checks of the parts of FEMIterate that go wrong silently instead of with an
+error, run against the same stand-ins as the benchmark:
+
+    python3 bench/verify.py
+
+Exits with 1 if any check fails.
+"""
+import math
+import os
+import shutil
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(BENCH_DIR, "stubs"), os.path.dirname(BENCH_DIR)]
+
+import FreeCAD  # noqa: E402
+from femtools.ccxtools import FemToolsCcx  # noqa: E402
+from FEMIterate.fidelity import MeshFidelity  # noqa: E402
+from FEMIterate.inpdeck import DeckPatcher  # noqa: E402
+from FEMIterate.resultcache import cache_key  # noqa: E402
+
+
+class VerifyError(Exception):
+    pass
+
+
+def expect(condition, msg):
+    if not condition:
+        raise VerifyError(msg)
+
+
+def _solver(doc):
+    solver = doc.addObject("Fem::FemSolverObjectPython", "CalculiXccxTools")
+    # Both are new objects every time the document is opened
+    solver.Proxy = object()
+    solver.Analysis = doc.addObject("Fem::FemAnalysis", "Analysis")
+    solver.AnalysisType = "static"
+    solver.TimeEnd = FreeCAD.Quantity("1.0 s")
+    solver.IterationsMaximum = 2000
+    solver.SplitInputWriter = False
+    return solver
+
+
+def check_cache_key_stable(tmp_dir):
+    """
+    The result cache key of a solve stays the same when the document is
+    opened again, and changes with the solver settings.
+    """
+    deck = os.path.join(tmp_dir, "FEMMeshGmsh.inp")
+    with open(deck, "w") as f:
+        f.write("*NODE, NSET=Nall\n1, 0.0, 0.0, 0.0\n*STEP\n*STATIC\n*END STEP\n")
+    values = {"Box.Length": "11.0 mm"}
+
+    keys = []
+    for _ in range(2):
+        solver = _solver(FreeCAD.newDocument("Verify"))
+        keys.append(cache_key(deck, values, solver, "ccx"))
+    expect(keys[0] == keys[1], "cache key differs between two sessions of the same document")
+
+    solver.IterationsMaximum = 4000
+    expect(cache_key(deck, values, solver, "ccx") != keys[0],
+           "cache key does not change with the solver settings")
+
+
+def check_coarse_auto_size(tmp_dir):
+    """
+    A mesh with an automatic maximum element size is still coarsened, and
+    gets its automatic size back afterwards.
+    """
+    doc = FreeCAD.newDocument("Verify")
+    box = doc.addObject("Part::Box", "Box")
+    (box.Length, box.Width, box.Height) = (FreeCAD.Quantity("10.0 mm"),) * 3
+    box.Shape = FreeCAD.Shape(box)
+    mesh = doc.addObject("Fem::FemMeshObjectPython", "FEMMeshGmsh")
+    mesh.Part = box
+    mesh.CharacteristicLengthMax = FreeCAD.Quantity("0.0 mm")
+    mesh.CharacteristicLengthMin = FreeCAD.Quantity("0.0 mm")
+
+    mesh.FemMesh = FreeCAD.FemMesh(0)
+    expect(MeshFidelity(mesh, 2.0).unsupported, "coarsening an automatic size without a mesh to go by")
+
+    mesh.FemMesh = FreeCAD.FemMesh(1000)
+    fidelity = MeshFidelity(mesh, 2.0)
+    expect(fidelity.unsupported is None, f"automatic size not coarsened: {fidelity.unsupported}")
+    fidelity.set_coarse(True)
+    expect(abs(float(mesh.CharacteristicLengthMax) - 2.0) < 1e-9,
+           f"coarse maximum size {mesh.CharacteristicLengthMax}, expected 2 mm")
+    fidelity.restore()
+    expect(float(mesh.CharacteristicLengthMax) == 0.0, "automatic size not restored")
+
+
+def _deck_lines(inp_file_name):
+    """
+    @returns the lines of a deck with its includes read in
+    """
+    lines = []
+    with open(inp_file_name) as f:
+        for line in f:
+            if line.upper().startswith("*INCLUDE,INPUT="):
+                include = os.path.join(os.path.dirname(inp_file_name), line.split("=", 1)[1].strip())
+                lines.extend(_deck_lines(include))
+            else:
+                lines.append(line)
+    return lines
+
+
+def _same_card(a, b):
+    """
+    Patched values are scaled rather than divided up again, the last digit may differ.
+    """
+    if a == b:
+        return True
+    (a, b) = (a.split(","), b.split(","))
+    try:
+        return a[:-1] == b[:-1] and math.isclose(float(a[-1]), float(b[-1]), rel_tol=1e-12)
+    except ValueError:
+        return False
+
+
+def check_patched_deck_matches_full(tmp_dir):
+    """
+    A deck with only the load cards patched is the deck ccxtools writes in
+    full for the same force, whether the static parts are included or inline.
+    """
+    doc = FreeCAD.newDocument("Verify")
+    box = doc.addObject("Part::Box", "Box")
+    box.Length = FreeCAD.Quantity("10.0 mm")
+    analysis = doc.addObject("Fem::FemAnalysis", "Analysis")
+    mesh = doc.addObject("Fem::FemMeshObjectPython", "FEMMeshGmsh", bases=("Fem::FemMeshObject",))
+    mesh.Part = box
+    mesh.FemMesh = FreeCAD.FemMesh(500)
+    force = doc.addObject("Fem::ConstraintForce", "ConstraintForce")
+    force.Force = FreeCAD.Quantity("100.0 N")
+    analysis.Group = [mesh, force]
+    fea = FemToolsCcx(analysis)
+    changes = {"ConstraintForce": {"Force": {}}}
+    expect(DeckPatcher.supports(changes), "force changes need a full rewrite")
+
+    for inline in (False, True):
+        force.Force = FreeCAD.Quantity("100.0 N")
+        fea.setup_working_dir(os.path.join(tmp_dir, f"base{inline:d}"))
+        fea.write_inp_file()
+        patcher = DeckPatcher(changes, inline=inline)
+        expect(patcher.set_base(fea.inp_file_name), "force cards not found in the deck")
+
+        force.Force = FreeCAD.Quantity("250.0 N")
+        patched = patcher.write(os.path.join(tmp_dir, f"patched{inline:d}"))
+        fea.setup_working_dir(os.path.join(tmp_dir, f"full{inline:d}"))
+        fea.write_inp_file()
+
+        (patched, full) = (_deck_lines(patched), _deck_lines(fea.inp_file_name))
+        expect(len(patched) == len(full), f"patched deck has {len(patched)} lines, the full one {len(full)}")
+        for (n, (a, b)) in enumerate(zip(patched, full), 1):
+            expect(_same_card(a, b), f"line {n} differs, patched {a.strip()!r}, full {b.strip()!r}")
+
+
+CHECKS = [check_cache_key_stable, check_coarse_auto_size, check_patched_deck_matches_full]
+
+
+def main():
+    failed = 0
+    for check in CHECKS:
+        tmp_dir = tempfile.mkdtemp(prefix="femiterate-verify-")
+        try:
+            check(tmp_dir)
+            print(f"ok    {check.__name__}")
+        except VerifyError as e:
+            failed += 1
+            print(f"FAIL  {check.__name__}: {e}")
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())